@@ -7,12 +7,73 @@ Flags column restored while keeping the new v3.1 column order.
 """
 
 import os
+import sys
+import gc
+import io
 import csv
-import glob
+import math
+import mmap
+import queue
+import struct
+import codecs
+import operator
+import array
+import base64
+import bisect
+import itertools
+import fnmatch
+import re
+import gzip
+import hmac
+import cProfile
+import hashlib
 import argparse
+import contextlib
+import collections
+import threading
+import heapq
+import time
 import traceback
+import concurrent.futures
 from datetime import datetime
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, Response, jsonify, request, send_from_directory
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+try:
+    import pyinstrument
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    pyinstrument = SpeedscopeRenderer = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pc = pa_csv = None
 
 TERMINAL_HTML = r"""<!DOCTYPE html>
 <html lang="en">
@@ -129,8 +190,12 @@ td.pin-cell .pin-star{color:var(--txt3);transition:color .15s}
 td.pin-cell:hover .pin-star{color:var(--yellow)}
 td.rank{text-align:center;color:var(--txt3);font-weight:600}
 td.rank .rn{display:inline-block;min-width:20px;padding:1px 4px;border-radius:2px;font-size:10px}
-tr:nth-child(-n+3) td.rank .rn{background:var(--orange);color:#000;font-weight:700}
-tr:nth-child(n+4):nth-child(-n+10) td.rank .rn{background:var(--bg4);color:var(--orange)}
+tr.top3 td.rank .rn{background:var(--orange);color:#000;font-weight:700}
+tr.top10 td.rank .rn{background:var(--bg4);color:var(--orange)}
+tr.vspacer,tr.vspacer:hover{background:none !important}
+td.flash{animation:cell-flash 1.2s ease-out}
+@keyframes cell-flash{0%{background:rgba(255,140,0,.38)}100%{background:transparent}}
+tr.vspacer td{padding:0;border:0}
 td.sym{font-weight:700;color:var(--cyan);letter-spacing:.5px;cursor:pointer;position:relative}
 td.sym:hover{text-decoration:underline}
 td.sym .copy-hint{display:none;position:absolute;top:-18px;left:0;background:var(--bg4);color:var(--orange);font-size:8px;padding:1px 4px;border-radius:2px;white-space:nowrap;pointer-events:none;z-index:20}
@@ -224,8 +289,15 @@ td.sess{color:var(--txt2);font-size:10px}
 
 <script>
 let C={},CSV_COLUMNS=[],ALL_DATA=[],filtered=[],displayCount=25;
+const SERVER_PARAM=new URLSearchParams(location.search).get('server');
+const SERVER_MODE=SERVER_PARAM==='1'||(SERVER_PARAM!=='0'&&window.matchMedia('(max-width: 768px)').matches);
+let serverMatched=0,serverSeq=0,serverTimer=null,symIndex=null;
+/* virtualized table: shownRows is the full display list, only vStart..vEnd is in the DOM */
+const OVERSCAN=12;
+let shownRows=[],rowH=0,vStart=0,vEnd=0,paintQueued=false;
 let sortColName=null,sortDir='asc';
-let lastModified='',dataLoadTime=null;
+let lastModified='',lastSnapshotId='',dataLoadTime=null;
+let evtSource=null,pollTimer=null;
 let selectedIdx=-1;
 let pinnedSymbols=new Set();
 let activeQF=new Set();
@@ -258,6 +330,11 @@ const TABLE_COLS=[
   {name:'spread_pct',      key:'SP', label:'Sprd',   cls:'col-spread'},
   {name:'_flags',          key:'FL', label:'Flags',  cls:'col-flags',  nosort:true},
 ];
+/* columns the grid, filters, stats and export read (?cols=); openDetail() fetches the full row */
+const FLAG_COLS=['flag_hod','flag_thin_supply','flag_big_move','flag_gap_up','flag_illiquid','flag_broken_quote','flag_no_dollar_vol',
+  'flag_has_earnings','flag_low_ah_liquidity','flag_session_reversal','flag_session_exhaustion','flag_pm_active'];
+const GRID_COLS=[...new Set([...TABLE_COLS.map(c=>c.name).filter(n=>!n.startsWith('_')),...FLAG_COLS,
+  'price','change_pct','volume','sector','lnk_Google_News','lnk_StockTwits','lnk_Google_Finance'])].join(',');
 
 function hasCol(n){return Object.prototype.hasOwnProperty.call(C,n)}
 function gv(r,c){const i=C[c];return(i===undefined||!Array.isArray(r))?'':r[i]}
@@ -280,18 +357,18 @@ function getRowLinks(r){
 }
 
 async function init(){
-  buildHeader();updateClock();setInterval(updateClock,1000);setInterval(updateAgo,15000);
-  document.getElementById('showCount').addEventListener('change',e=>{displayCount=+e.target.value;render()});
+  buildHeader();initTable();if(!SERVER_MODE)startEngine();updateClock();setInterval(updateClock,1000);setInterval(updateAgo,15000);
+  document.getElementById('showCount').addEventListener('change',e=>{displayCount=+e.target.value;if(SERVER_MODE)loadData(true);else render()});
   document.getElementById('archFilter').addEventListener('change',()=>applyFilters());
   document.getElementById('presetFilter').addEventListener('change',()=>applyFilters());
   document.getElementById('searchBox').addEventListener('input',()=>applyFilters());
   document.getElementById('refreshBtn').addEventListener('click',()=>loadData());
   document.getElementById('exportBtn').addEventListener('click',exportCSV);
-  document.getElementById('loadMoreBtn').addEventListener('click',()=>{displayCount+=25;render()});
+  document.getElementById('loadMoreBtn').addEventListener('click',()=>{displayCount+=25;if(SERVER_MODE)loadMoreServer();else render()});
   document.getElementById('overlay').addEventListener('click',e=>{if(e.target===e.currentTarget)closeDetail()});
   document.querySelectorAll('.qf').forEach(el=>{el.addEventListener('click',()=>{const f=el.dataset.qf;if(activeQF.has(f)){activeQF.delete(f);el.classList.remove('active')}else{activeQF.add(f);el.classList.add('active')}applyFilters()})});
   document.addEventListener('keydown',handleKeyboard);
-  setInterval(checkForUpdates,30000);
+  startUpdates();
   await loadData();
 }
 
@@ -310,62 +387,263 @@ function handleKeyboard(e){
   else if((e.key==='t'||e.key==='T')&&selectedIdx>=0){e.preventDefault();const s=getSym(shown[selectedIdx]);if(s)window.open('https://www.tradingview.com/chart/?symbol='+encodeURIComponent(s),'_blank')}
   else if((e.key==='p'||e.key==='P')&&selectedIdx>=0){e.preventDefault();togglePin(getSym(shown[selectedIdx]));render()}
 }
-function renderSelection(){document.querySelectorAll('#tbody tr').forEach((tr,i)=>{tr.classList.toggle('selected',i===selectedIdx)})}
-function scrollToSelected(){const rows=document.querySelectorAll('#tbody tr');if(rows[selectedIdx])rows[selectedIdx].scrollIntoView({block:'nearest',behavior:'smooth'})}
-function togglePin(sym){if(!sym)return;sym=sym.toUpperCase();if(pinnedSymbols.has(sym))pinnedSymbols.delete(sym);else pinnedSymbols.add(sym);savePins()}
+function renderSelection(){document.querySelectorAll('#tbody tr[data-i]').forEach(tr=>{tr.classList.toggle('selected',+tr.dataset.i===selectedIdx)})}
+function scrollToSelected(){
+  if(selectedIdx<0)return;
+  const wrap=document.getElementById('tableWrap'),h=rowH||22,y=selectedIdx*h,headH=document.getElementById('thead').offsetHeight;
+  if(y<wrap.scrollTop)wrap.scrollTop=y;
+  else if(y+h+headH>wrap.scrollTop+wrap.clientHeight)wrap.scrollTop=y+h+headH-wrap.clientHeight;
+  paintRows(false);
+}
+function togglePin(sym){if(!sym)return;sym=sym.toUpperCase();if(pinnedSymbols.has(sym))pinnedSymbols.delete(sym);else pinnedSymbols.add(sym);savePins();if(SERVER_MODE)scheduleServerQuery()}
 
-async function loadData(){
+async function loadData(quiet){
   const btn=document.getElementById('refreshBtn');btn.classList.add('loading');
   try{
-    const resp=await fetch('/api/data');const data=await resp.json();
+    const data=SERVER_MODE?await serverQuery(false):await (await fetch('/api/data?format=columnar&cols='+GRID_COLS)).json();
+    if(!data)return;
     if(data.error){showToast('⚠ '+data.error);updateStatus('error');return}
     CSV_COLUMNS=Array.isArray(data.columns)?data.columns:[];
-    C=data.col_index||{};ALL_DATA=Array.isArray(data.rows)?data.rows:[];
-    lastModified=data.modified||'';dataLoadTime=new Date();
-    populateFilters();applyFilters();
+    C=data.col_index||{};symIndex=null;ALL_DATA=expandLinks(data,data.format==='columnar'?decodeColumnar(data):Array.isArray(data.rows)?data.rows:[]);
+    lastModified=data.modified||'';lastSnapshotId=data.snapshot_id||'';dataLoadTime=new Date();
+    if(SERVER_MODE)showServerPage(data);else{loadEngine();populateFilters();applyFilters(true)}
     document.getElementById('fileName').textContent=data.file||'—';
     document.getElementById('dataTs').textContent=(data.file||'—')+' — '+(data.modified||'—');
     document.getElementById('fTotal').textContent=Number(data.total||0).toLocaleString();
     if(ALL_DATA.length&&hasCol('session')){const sess=(gv(ALL_DATA[0],'session')||'').toString();if(sess)document.getElementById('sessionLabel').textContent=sess}
-    updateStatus('live');updateAgo();showToast('✓ '+Number(data.total||0).toLocaleString()+' tickers loaded');
+    updateStatus('live');updateAgo();if(!quiet)showToast('✓ '+Number(data.total||0).toLocaleString()+' tickers loaded');
   }catch(err){showToast('⚠ '+err.message);updateStatus('error')}
   finally{btn.classList.remove('loading');document.getElementById('loadingScreen').classList.add('hidden')}
 }
-async function checkForUpdates(){try{const r=await fetch('/api/status');const s=await r.json();if(s.ok&&s.modified!==lastModified){showToast('🔄 CSV updated…');await loadData()}}catch(e){}}
+/* Server mode (narrow screens or ?server=1, opt out with ?server=0): /api/data filters,
+   sorts and pages on the server so only the rendered rows are downloaded */
+function serverQueryString(offset,limit){
+  const p=new URLSearchParams(),arch=document.getElementById('archFilter').value,preset=document.getElementById('presetFilter').value,q=document.getElementById('searchBox').value.trim();
+  if(arch)p.set('arch',arch);if(preset)p.set('preset',preset);if(q)p.set('q',q);
+  if(activeQF.size)p.set('qf',[...activeQF].join(','));
+  if(pinnedSymbols.size)p.set('pins',[...pinnedSymbols].join(','));
+  if(sortColName!==null){p.set('sort',sortColName);p.set('dir',sortDir)}
+  p.set('offset',offset);p.set('limit',limit);p.set('cols',GRID_COLS);
+  return p.toString();
+}
+async function serverQuery(append){
+  const seq=++serverSeq,offset=append?filtered.length:0,limit=append?Math.max(0,displayCount-filtered.length):displayCount;
+  const resp=await fetch('/api/data?'+serverQueryString(offset,limit));const data=await resp.json();
+  return seq===serverSeq?data:null;
+}
+function showServerPage(data){
+  const sel=selectedSymbol();
+  filtered=ALL_DATA;serverMatched=Number(data.matched||0);
+  populateFilters(data.facets&&data.facets.archetypes);restoreSelection(sel);render(true);
+}
+function scheduleServerQuery(){clearTimeout(serverTimer);serverTimer=setTimeout(()=>loadData(true),150)}
+async function loadMoreServer(){
+  try{
+    const d=await serverQuery(true);if(!d)return;
+    if(d.error||d.snapshot_id!==lastSnapshotId)return loadData(true);
+    ALL_DATA=ALL_DATA.concat(expandLinks(d,d.rows||[]));filtered=ALL_DATA;symIndex=null;serverMatched=Number(d.matched||0);render();
+  }catch(err){showToast('⚠ '+err.message)}
+}
+/* projected payloads send lnk_* columns as a template over symbol/exchange plus
+   per-symbol overrides; rebuild them as trailing row columns */
+function expandLinks(data,rows){
+  const names=data.link_columns||[],links=data.links||{};if(!names.length)return rows;
+  names.forEach((c,k)=>{if(!hasCol(c))C[c]=(data.columns||[]).length+k});
+  const si=C.symbol,ei=C.exchange,idx=names.map(c=>C[c]),own=Object.prototype.hasOwnProperty;
+  rows.forEach(r=>{
+    const sym=String(r[si]??''),ex=String(r[ei]??'');
+    names.forEach((c,k)=>{const l=links[c];r[idx[k]]=own.call(l.x,sym)?l.x[sym]:l.t.split('{symbol}').join(sym).split('{exchange}').join(ex)});
+  });
+  return rows;
+}
+function b64Bytes(s){const bin=atob(s),n=bin.length,u=new Uint8Array(n);for(let i=0;i<n;i++)u[i]=bin.charCodeAt(i);return u}
+function decodeColumnar(data){
+  const cols=data.columns||[],n=Number(data.total||0),rows=new Array(n);
+  for(let i=0;i<n;i++)rows[i]=new Array(cols.length).fill('');
+  cols.forEach((c,j)=>{
+    const s=data.data[c];if(!s)return;
+    let vals;
+    if(s.t==='f64')vals=new Float64Array(b64Bytes(s.b64).buffer);
+    else if(s.t==='i64')vals=Array.from(new BigInt64Array(b64Bytes(s.b64).buffer),Number);
+    else if(s.t==='i32')vals=new Int32Array(b64Bytes(s.b64).buffer);
+    else if(s.t==='const'){for(let i=0;i<n;i++)rows[i][j]=s.v;return}
+    else if(s.t==='bits'){const u=b64Bytes(s.b64);for(let i=0;i<n;i++)rows[i][j]=((u[i>>3]>>(i&7))&1)===1;return}
+    else if(s.t==='dict'){const u=b64Bytes(s.idx.b64),ix=s.idx.t==='u8'?u:s.idx.t==='u16'?new Uint16Array(u.buffer):new Uint32Array(u.buffer);for(let i=0;i<n;i++)rows[i][j]=s.dict[ix[i]];return}
+    else vals=s.v;
+    for(let i=0;i<n;i++)rows[i][j]=vals[i];
+  });
+  return rows;
+}
+/* Push updates over SSE; fall back to 30 s /api/status polling while the stream is down.
+   A stream refused before it ever opened (204 from single-threaded workers) is not retried. */
+function startPolling(){if(!pollTimer)pollTimer=setInterval(checkForUpdates,30000)}
+function stopPolling(){if(pollTimer){clearInterval(pollTimer);pollTimer=null}}
+function startUpdates(){
+  if(!window.EventSource){startPolling();return}
+  let opened=false;
+  evtSource=new EventSource('/api/stream');
+  evtSource.onopen=()=>{opened=true;stopPolling()};
+  evtSource.addEventListener('snapshot',e=>{let d;try{d=JSON.parse(e.data)}catch(_){return}if(d.snapshot_id&&d.snapshot_id!==lastSnapshotId){showToast('🔄 CSV updated…');loadDelta()}});
+  evtSource.onerror=()=>{startPolling();if(evtSource.readyState===EventSource.CLOSED){evtSource=null;if(opened)setTimeout(startUpdates,60000)}};
+}
+async function checkForUpdates(){try{const r=await fetch('/api/status');const s=await r.json();if(s.ok&&s.modified!==lastModified){showToast('🔄 CSV updated…');await loadDelta()}}catch(e){}}
+/* Patch ALL_DATA in place from /api/data/delta; any mismatch falls back to a full load */
+async function loadDelta(){
+  if(SERVER_MODE)return loadData(true);
+  if(!lastSnapshotId||!ALL_DATA.length||!hasCol('symbol'))return loadData();
+  try{
+    const resp=await fetch('/api/data/delta?since='+encodeURIComponent(lastSnapshotId)+'&cols='+GRID_COLS);const d=await resp.json();
+    if(d.full||d.error||!Array.isArray(d.changed))return loadData();
+    applyDelta(d);
+  }catch(err){return loadData()}
+}
+function applyDelta(d){
+  const si=C.symbol,bySym=new Map();ALL_DATA.forEach(r=>bySym.set(r[si],r));
+  d.changed.forEach(([sym,cells])=>{const r=bySym.get(sym);if(!r)return;for(const c in cells){if(hasCol(c))r[C[c]]=cells[c]}});
+  if(d.removed.length){const rm=new Set(d.removed);let w=0;for(let i=0;i<ALL_DATA.length;i++){if(!rm.has(ALL_DATA[i][si]))ALL_DATA[w++]=ALL_DATA[i]}ALL_DATA.length=w}
+  d.added.forEach(r=>{ALL_DATA.push(r);bySym.set(r[si],r)});
+  if(d.order){const pos=new Map(d.order.map((s,i)=>[s,i]));ALL_DATA.sort((a,b)=>(pos.get(a[si])??0)-(pos.get(b[si])??0))}
+  symIndex=null;lastSnapshotId=d.snapshot_id||'';lastModified=d.modified||'';dataLoadTime=new Date();
+  loadEngine();populateFilters();applyFilters(true);
+  document.getElementById('fileName').textContent=d.file||'—';
+  document.getElementById('dataTs').textContent=(d.file||'—')+' — '+(d.modified||'—');
+  document.getElementById('fTotal').textContent=Number(d.total||0).toLocaleString();
+  updateStatus('live');updateAgo();
+}
 function updateAgo(){if(!dataLoadTime){document.getElementById('updateAgo').textContent='';return}const s=Math.floor((Date.now()-dataLoadTime.getTime())/1000);let txt;if(s<60)txt='just now';else if(s<3600)txt=Math.floor(s/60)+'m ago';else txt=Math.floor(s/3600)+'h ago';document.getElementById('updateAgo').textContent='· '+txt}
 function updateStatus(state){const b=document.getElementById('statusBadge'),d=document.getElementById('statusDot');b.className='header-badge';if(state==='live'){b.classList.add('badge-live');b.textContent='LIVE';d.style.background='var(--green)'}else if(state==='error'){b.classList.add('badge-error');b.textContent='ERROR';d.style.background='var(--red)'}else{b.classList.add('badge-stale');b.textContent='STALE';d.style.background='var(--yellow)'}}
 function showToast(m){const t=document.getElementById('toast');t.textContent=m;t.classList.add('show');setTimeout(()=>t.classList.remove('show'),2800)}
 
-function populateFilters(){
-  const archs=new Set();
-  ALL_DATA.forEach(r=>{const a=(gv(r,'ml_archetype')||'').toString();if(a)archs.add(a)});
+function populateFilters(list){
+  const archs=new Set(list||[]);
+  if(!list)ALL_DATA.forEach(r=>{const a=(gv(r,'ml_archetype')||'').toString();if(a)archs.add(a)});
   const af=document.getElementById('archFilter');const prev=af.value;
   af.innerHTML='<option value="">ALL</option>';
   [...archs].sort().forEach(a=>{const o=document.createElement('option');o.value=a;o.textContent=a;af.appendChild(o)});
   af.value=prev;
 }
 
-function applyFilters(){
-  const arch=document.getElementById('archFilter').value,preset=document.getElementById('presetFilter').value,q=document.getElementById('searchBox').value.toUpperCase();
-  filtered=ALL_DATA.filter(r=>{
-    const sym=getSym(r).toUpperCase(),name=(gv(r,'name')??'').toString().toUpperCase(),archetype=(gv(r,'ml_archetype')??'').toString(),presetList=(gv(r,'presets_list')??'').toString();
-    if(arch&&archetype!==arch)return false;
-    if(preset&&!presetList.includes(preset))return false;
-    if(q&&!sym.includes(q)&&!name.includes(q))return false;
-    if(activeQF.has('pinned')&&!pinnedSymbols.has(sym))return false;
-    if(activeQF.has('gap')&&num(gv(r,'gap_pct'),0)<=5)return false;
-    if(activeQF.has('hod')&&!isTrueLike(gv(r,'flag_hod')))return false;
-    if(activeQF.has('explosive')&&archetype!=='EXPLOSIVE')return false;
-    if(activeQF.has('pm')&&!isTrueLike(gv(r,'flag_pm_active')))return false;
-    if(activeQF.has('earnings')&&!isTrueLike(gv(r,'flag_has_earnings')))return false;
-    return true;
-  });
-  if(sortColName!==null)doSort();
-  else{
-    const pinned=[],unpinned=[];filtered.forEach(r=>{if(pinnedSymbols.has(getSym(r).toUpperCase()))pinned.push(r);else unpinned.push(r)});
-    filtered=[...pinned,...unpinned];
+/* Filtering and sorting run in filterEngine, inside a Worker built from its own
+   source (or synchronously when Workers are unavailable). It keeps typed-array
+   copies of the columns it needs: effective price/chg/vol, pre-uppercased
+   search keys, archetype codes, quick-filter flags and, per sorted column, a
+   collation rank (numbers first, then text in locale order). Queries come back
+   as an Int32Array permutation of ALL_DATA. */
+const ENGINE_COLS=['symbol','name','ml_archetype','presets_list','gap_pct','flag_hod','flag_pm_active','flag_has_earnings',
+  'px_eff','price','chg_eff','change_pct','vol_eff','volume'];
+let engine=null,engineGen=0,engineSeq=0,engineWant=null,engineBusy=false;
+function filterEngine(scope){
+  const collator=new Intl.Collator();
+  let N=0,gen=0,raw={},symU=[],nameU=[],presetL=[],arch=null,archCode=new Map(),flags={},eff={},rankCache={};
+  const num=v=>{const n=Number(v);return Number.isFinite(n)?n:0};
+  const isTrueLike=v=>v===true||String(v).toLowerCase()==='true'||String(v)==='1';
+  const col=c=>raw[c]||new Array(N).fill('');
+  const bits=(vals,f)=>{const u=new Uint8Array(N);for(let i=0;i<N;i++)u[i]=f(vals[i])?1:0;return u};
+  const effective=(a,b)=>{const x=col(a),y=col(b),out=new Float64Array(N);for(let i=0;i<N;i++)out[i]=num(x[i]||y[i]||0);return out};
+  function load(m){
+    gen=m.gen;N=m.n;raw=m.cols;rankCache={};
+    symU=col('symbol').map(v=>(v??'').toString().toUpperCase());
+    nameU=col('name').map(v=>(v??'').toString().toUpperCase());
+    presetL=col('presets_list').map(v=>(v??'').toString());
+    archCode=new Map();arch=new Int32Array(N);
+    col('ml_archetype').forEach((v,i)=>{const a=(v??'').toString();if(!archCode.has(a))archCode.set(a,archCode.size);arch[i]=archCode.get(a)});
+    flags={gap:bits(col('gap_pct'),v=>num(v)>5),hod:bits(col('flag_hod'),isTrueLike),pm:bits(col('flag_pm_active'),isTrueLike),
+           earnings:bits(col('flag_has_earnings'),isTrueLike)};
+    eff={px_eff:effective('px_eff','price'),chg_eff:effective('chg_eff','change_pct'),vol_eff:effective('vol_eff','volume')};
+  }
+  function ranks(c){
+    if(rankCache[c])return rankCache[c];
+    const vals=eff[c]||col(c),isNum=new Uint8Array(N),key=new Array(N),nums=new Set(),strs=new Set();
+    for(let i=0;i<N;i++){
+      const v=vals[i],n=Number(v);
+      if(v!==''&&Number.isFinite(n)){isNum[i]=1;key[i]=n;nums.add(n)}else{key[i]=(v??'').toString();strs.add(key[i])}
+    }
+    const numPos=new Map(),strPos=new Map();
+    [...nums].sort((a,b)=>a-b).forEach((x,k)=>numPos.set(x,k));
+    [...strs].sort(collator.compare).forEach((x,k)=>strPos.set(x,nums.size+k));
+    const rank=new Int32Array(N);
+    for(let i=0;i<N;i++)rank[i]=isNum[i]?numPos.get(key[i]):strPos.get(key[i]);
+    return rankCache[c]=rank;
+  }
+  function query(m){
+    const q=m.q,preset=m.preset,qf=new Set(m.qf),pins=new Set(m.pins);
+    const archF=m.arch?(archCode.has(m.arch)?archCode.get(m.arch):-2):-1,explosive=archCode.has('EXPLOSIVE')?archCode.get('EXPLOSIVE'):-2;
+    const P=new Int32Array(N),R=new Int32Array(N);let np=0,nr=0;
+    for(let i=0;i<N;i++){
+      if(archF!==-1&&arch[i]!==archF)continue;
+      if(preset&&!presetL[i].includes(preset))continue;
+      if(q&&!symU[i].includes(q)&&!nameU[i].includes(q))continue;
+      const pinned=pins.size>0&&pins.has(symU[i]);
+      if(qf.has('pinned')&&!pinned)continue;
+      if(qf.has('gap')&&!flags.gap[i])continue;
+      if(qf.has('hod')&&!flags.hod[i])continue;
+      if(qf.has('explosive')&&arch[i]!==explosive)continue;
+      if(qf.has('pm')&&!flags.pm[i])continue;
+      if(qf.has('earnings')&&!flags.earnings[i])continue;
+      if(pinned)P[np++]=i;else R[nr++]=i;
+    }
+    const perm=new Int32Array(np+nr);perm.set(P.subarray(0,np));perm.set(R.subarray(0,nr),np);
+    if(m.sort){
+      const rank=ranks(m.sort),cmp=m.dir==='asc'?(a,b)=>rank[a]-rank[b]||a-b:(a,b)=>rank[b]-rank[a]||a-b;
+      perm.subarray(0,np).sort(cmp);perm.subarray(np).sort(cmp);
+    }
+    return perm;
   }
-  selectedIdx=-1;render();
+  scope.onmessage=e=>{
+    const m=e.data;
+    if(m.type==='load')load(m);
+    else if(m.type==='query'){
+      const perm=m.gen===gen?query(m):null;
+      scope.postMessage({type:'result',gen:m.gen,seq:m.seq,perm},perm?[perm.buffer]:[]);
+    }
+  };
+}
+function startEngine(){
+  try{
+    const url=URL.createObjectURL(new Blob(['('+filterEngine.toString()+')(self)'],{type:'text/javascript'}));
+    engine=new Worker(url);URL.revokeObjectURL(url);
+    engine.onmessage=onEngineMessage;
+    engine.onerror=e=>{e.preventDefault();engine.terminate();syncEngine()};
+  }catch(e){syncEngine()}
+}
+/* same engine on the main thread: slower on large universes, but never wrong */
+function syncEngine(){
+  const scope={postMessage:d=>onEngineMessage({data:d})};
+  filterEngine(scope);
+  engine={postMessage:d=>scope.onmessage({data:d})};
+  engineBusy=false;
+  if(ALL_DATA.length)loadEngine();
+  if(engineWant)postQuery();
+}
+function loadEngine(){
+  const cols={},names=new Set(ENGINE_COLS);
+  TABLE_COLS.forEach(c=>{if(!c.nosort&&!c.name.startsWith('_'))names.add(c.name)});
+  names.forEach(c=>{const i=C[c];if(i!==undefined)cols[c]=ALL_DATA.map(r=>Array.isArray(r)?r[i]:'')});
+  engineGen++;
+  engine.postMessage({type:'load',gen:engineGen,n:ALL_DATA.length,cols});
+}
+/* at most one query in flight: keystrokes typed meanwhile collapse into the latest */
+function postQuery(){
+  engineBusy=true;
+  engine.postMessage({type:'query',gen:engineGen,seq:engineWant.seq,arch:document.getElementById('archFilter').value,
+    preset:document.getElementById('presetFilter').value,q:document.getElementById('searchBox').value.toUpperCase(),
+    qf:[...activeQF],pins:[...pinnedSymbols],sort:sortColName,dir:sortDir});
+}
+function onEngineMessage(e){
+  const m=e.data,want=engineWant;
+  if(m.type!=='result')return;
+  engineBusy=false;
+  if(!want)return;
+  if(m.seq!==want.seq||m.gen!==engineGen||!m.perm){postQuery();return}
+  engineWant=null;
+  filtered=Array.from(m.perm,i=>ALL_DATA[i]);
+  restoreSelection(want.sel);render(want.refresh);
+}
+/* refresh=true (new data, re-sort) keeps the selected symbol selected and flashes changed cells */
+function applyFilters(refresh){
+  if(SERVER_MODE){scheduleServerQuery();return}
+  engineWant={seq:++engineSeq,sel:refresh?selectedSymbol():(engineWant&&engineWant.sel)||null,refresh:!!refresh||!!(engineWant&&engineWant.refresh)};
+  if(!engineBusy)postQuery();
 }
 
 function buildHeader(){
@@ -381,7 +659,7 @@ function buildHeader(){
         else{sortColName=c.name;sortDir=c.name==='master_rank'?'asc':'desc'}
         document.querySelectorAll('th').forEach(t=>t.classList.remove('sorted-asc','sorted-desc'));
         th.classList.add(sortDir==='asc'?'sorted-asc':'sorted-desc');
-        doSort();render();
+        if(SERVER_MODE)scheduleServerQuery();else applyFilters(true)
       });
     }
     tr.appendChild(th);
@@ -390,18 +668,6 @@ function buildHeader(){
   document.getElementById('thead').appendChild(tr);
 }
 
-function sortValue(row,colName){
-  if(colName==='px_eff')return getEffPrice(row);
-  if(colName==='chg_eff')return getEffChg(row);
-  if(colName==='vol_eff')return getEffVol(row);
-  const v=gv(row,colName);const n=Number(v);if(v!==''&&Number.isFinite(n))return n;return(v??'').toString();
-}
-function doSort(){
-  const pinned=[],unpinned=[];filtered.forEach(r=>{if(pinnedSymbols.has(getSym(r).toUpperCase()))pinned.push(r);else unpinned.push(r)});
-  const cmp=(a,b)=>{const va=sortValue(a,sortColName),vb=sortValue(b,sortColName);if(typeof va==='number'&&typeof vb==='number')return sortDir==='asc'?(va-vb):(vb-va);return sortDir==='asc'?String(va).localeCompare(String(vb)):String(vb).localeCompare(String(va))};
-  pinned.sort(cmp);unpinned.sort(cmp);filtered=[...pinned,...unpinned];
-}
-
 function fV(v){v=num(v,0);if(!v)return'—';if(v>=1e9)return(v/1e9).toFixed(1)+'B';if(v>=1e6)return(v/1e6).toFixed(1)+'M';if(v>=1e3)return(v/1e3).toFixed(1)+'K';return v.toString()}
 function fM(v){v=num(v,0);if(!v)return'—';if(v>=1e9)return'$'+(v/1e9).toFixed(2)+'B';if(v>=1e6)return'$'+(v/1e6).toFixed(1)+'M';if(v>=1e3)return'$'+(v/1e3).toFixed(0)+'K';return'$'+v}
 function fP(v){if(v===''||v===null||v===undefined)return'—';v=num(v,NaN);if(!Number.isFinite(v))return'—';return(v>0?'+':'')+v.toFixed(2)+'%'}
@@ -433,64 +699,169 @@ function linkCell(r){
   const links=getRowLinks(r);
   if(!links.length)return'<span style="color:var(--txt3)">—</span>';
   let h='<div class="lk-wrap">';
-  links.forEach(l=>{h+='<a href="'+escAttr(l.url)+'" target="_blank" rel="noopener" class="lk '+l.cls+'" onclick="event.stopPropagation()" title="'+escAttr(l.label)+'">'+l.label+'</a>'});
-  h+='<span class="lk-all" onclick="event.stopPropagation();openAllLinks(this)" data-sym="'+escAttr(getSym(r))+'" title="Open all links">ALL</span></div>';
+  links.forEach(l=>{h+='<a href="'+escAttr(l.url)+'" target="_blank" rel="noopener" class="lk '+l.cls+'" title="'+escAttr(l.label)+'">'+l.label+'</a>'});
+  h+='<span class="lk-all" data-act="all" data-sym="'+escAttr(getSym(r))+'" title="Open all links">ALL</span></div>';
   return h;
 }
-function openAllLinks(el){el.style.background='var(--green)';el.style.color='#000';const sym=el.dataset.sym;const row=ALL_DATA.find(r=>getSym(r)===sym);if(!row)return;getRowLinks(row).forEach(l=>window.open(l.url,'_blank'));setTimeout(()=>{el.style.background='';el.style.color=''},600)}
+function openAllLinks(el){el.style.background='var(--green)';el.style.color='#000';const sym=el.dataset.sym;const row=rowBySymbol(sym);if(!row)return;getRowLinks(row).forEach(l=>window.open(l.url,'_blank'));setTimeout(()=>{el.style.background='';el.style.color=''},600)}
+function rowBySymbol(sym){if(!symIndex){symIndex=new Map();ALL_DATA.forEach(r=>{const s=getSym(r);if(!symIndex.has(s))symIndex.set(s,r)})}return symIndex.get(sym)}
 function copySymbol(td,sym){navigator.clipboard.writeText(sym).then(()=>{td.classList.add('copied');td.querySelector('.copy-hint').textContent='✓ Copied!';setTimeout(()=>{td.classList.remove('copied');td.querySelector('.copy-hint').textContent='Click to copy'},800)})}
-function applyRowVisualQuality(tr,r){const broken=isTrueLike(gv(r,'flag_broken_quote')),noDollar=isTrueLike(gv(r,'flag_no_dollar_vol'));const illiq=isTrueLike(gv(r,'flag_illiquid')),spread=num(gv(r,'spread_pct'),0);if(broken||noDollar)tr.style.opacity='0.62';if(broken)tr.style.boxShadow='inset 3px 0 0 rgba(255,23,68,.75)';else if(illiq||spread>3)tr.style.boxShadow='inset 3px 0 0 rgba(255,82,82,.45)';else if(isTrueLike(gv(r,'flag_pm_active')))tr.style.boxShadow='inset 3px 0 0 rgba(0,230,118,.35)'}
+function applyRowVisualQuality(tr,r){tr.style.opacity='';tr.style.boxShadow='';const broken=isTrueLike(gv(r,'flag_broken_quote')),noDollar=isTrueLike(gv(r,'flag_no_dollar_vol'));const illiq=isTrueLike(gv(r,'flag_illiquid')),spread=num(gv(r,'spread_pct'),0);if(broken||noDollar)tr.style.opacity='0.62';if(broken)tr.style.boxShadow='inset 3px 0 0 rgba(255,23,68,.75)';else if(illiq||spread>3)tr.style.boxShadow='inset 3px 0 0 rgba(255,82,82,.45)';else if(isTrueLike(gv(r,'flag_pm_active')))tr.style.boxShadow='inset 3px 0 0 rgba(0,230,118,.35)'}
 
-function render(){
-  const shown=filtered.slice(0,displayCount);
+function initTable(){
   const tbody=document.getElementById('tbody');
-  tbody.innerHTML='';
-  shown.forEach((r,i)=>{
-    const tr=document.createElement('tr');if(i%2===0)tr.className='even';
-    const sym=getSym(r),symUp=sym.toUpperCase();const isPinned=pinnedSymbols.has(symUp);
-    if(isPinned)tr.classList.add('pinned');if(i===selectedIdx)tr.classList.add('selected');
-    tr.style.cursor='pointer';
-    tr.addEventListener('click',()=>{selectedIdx=i;renderSelection();openDetail(r)});
-    tr.addEventListener('dblclick',e=>{e.preventDefault();if(sym)window.open('https://www.tradingview.com/chart/?symbol='+encodeURIComponent(sym),'_blank')});
-
-    const px=getEffPrice(r),ch=getEffChg(r),vo=getEffVol(r);
-    const rv=num(gv(r,'rel_volume'),0),cs=num(gv(r,'composite_score'),0),ml=num(gv(r,'ml_final_score'),0);
-    const ga=num(gv(r,'gap_pct'),0),hd=num(gv(r,'hod_distance'),0);
-    const tu=num(gv(r,'turnover_rate'),0),vw=num(gv(r,'vwap'),NaN),sp=num(gv(r,'spread_pct'),NaN);
-    const cc=ch>=0?'up':'down';const sw=Math.min(100,Math.max(0,cs)),mw=Math.min(100,Math.max(0,ml));
-    let pxCls='price';if(Number.isFinite(vw)&&vw>0){if(px>vw*1.001)pxCls='price above-vwap';else if(px<vw*0.999)pxCls='price below-vwap'}
-
-    tr.innerHTML=
-      '<td class="pin-cell" onclick="event.stopPropagation();togglePin(\''+escAttr(sym)+'\');render()"><span class="pin-star">'+(isPinned?'★':'☆')+'</span></td>'+
-      '<td class="rank"><span class="rn">'+(gv(r,'master_rank')??'')+'</span></td>'+
-      '<td class="sym" onclick="event.stopPropagation();copySymbol(this,\''+escAttr(sym)+'\')">'+sym+'<span class="copy-hint">Click to copy</span></td>'+
-      '<td class="'+pxCls+'">$'+px.toFixed(2)+'</td>'+
-      '<td class="chg '+cc+'">'+fP(ch)+'</td>'+
-      '<td>'+linkCell(r)+'</td>'+
-      '<td class="name" title="'+escAttr(gv(r,'name'))+'">'+(gv(r,'name')??'')+'</td>'+
-      '<td class="sess">'+(gv(r,'session')??'')+'</td>'+
-      '<td class="center">'+(gv(r,'best_preset')||'—')+'</td>'+
-      '<td>'+presetT(gv(r,'presets_list'))+'</td>'+
-      '<td class="center"><span class="sb"><span class="sf" style="width:'+sw+'%;background:'+sC(cs)+'"></span><span class="st">'+cs.toFixed(0)+'</span></span></td>'+
-      '<td class="center"><span class="sb"><span class="sf" style="width:'+mw+'%;background:'+sC(ml)+'"></span><span class="st">'+ml.toFixed(0)+'</span></span></td>'+
-      '<td class="center">'+archB(gv(r,'ml_archetype'))+'</td>'+
-      '<td class="center">'+(gv(r,'ml_confidence')||'—')+'</td>'+
-      '<td class="num" style="color:'+(ga>0?'var(--green)':'var(--txt2)')+'">'+fP(ga)+'</td>'+
-      '<td class="num">'+(Number.isFinite(hd)?hd.toFixed(1)+'%':'—')+'</td>'+
-      '<td class="num">'+fV(vo)+'</td>'+
-      '<td class="num" style="color:'+(rv>=5?'var(--green)':rv>=2?'var(--yellow)':'var(--txt2)')+'">'+rv.toFixed(1)+'x</td>'+
-      '<td class="num">'+(Number.isFinite(tu)?tu.toFixed(2)+'x':'—')+'</td>'+
-      '<td class="num">'+(Number.isFinite(vw)?'$'+vw.toFixed(2):'—')+'</td>'+
-      '<td class="num">'+(Number.isFinite(sp)?fP(sp):'—')+'</td>'+
-      '<td>'+flagT(r)+'</td>';
-
-    applyRowVisualQuality(tr,r);
-    tbody.appendChild(tr);
-  });
-  document.getElementById('countBadge').textContent=shown.length+' / '+filtered.length;
+  tbody.addEventListener('click',onRowClick);
+  tbody.addEventListener('dblclick',onRowDblClick);
+  document.getElementById('tableWrap').addEventListener('scroll',queuePaint,{passive:true});
+  window.addEventListener('resize',()=>{rowH=0;queuePaint()});
+}
+function queuePaint(){if(!paintQueued){paintQueued=true;requestAnimationFrame(()=>{paintQueued=false;paintRows(false)})}}
+function rowAt(el){const tr=el.closest('tr[data-i]');return tr?shownRows[+tr.dataset.i]:undefined}
+function onRowClick(e){
+  const r=rowAt(e.target);if(!r||e.target.closest('a.lk'))return;
+  const sym=getSym(r),act=e.target.closest('[data-act]');
+  if(act){
+    if(act.dataset.act==='pin'){togglePin(sym);render()}
+    else if(act.dataset.act==='copy')copySymbol(act,sym);
+    else if(act.dataset.act==='all')openAllLinks(act);
+    return;
+  }
+  selectedIdx=+e.target.closest('tr').dataset.i;renderSelection();openDetail(r);
+}
+function onRowDblClick(e){
+  const r=rowAt(e.target);if(!r||e.target.closest('a.lk,[data-act]'))return;
+  e.preventDefault();const sym=getSym(r);if(sym)window.open('https://www.tradingview.com/chart/?symbol='+encodeURIComponent(sym),'_blank');
+}
+
+function rowClass(r,i){
+  let c=i%2===0?'even':'';
+  if(pinnedSymbols.has(getSym(r).toUpperCase()))c+=' pinned';
+  if(i===selectedIdx)c+=' selected';
+  if(i<3)c+=' top3';else if(i<10)c+=' top10';
+  return c;
+}
+function rowCells(r){
+  const sym=getSym(r),isPinned=pinnedSymbols.has(sym.toUpperCase());
+  const px=getEffPrice(r),ch=getEffChg(r),vo=getEffVol(r);
+  const rv=num(gv(r,'rel_volume'),0),cs=num(gv(r,'composite_score'),0),ml=num(gv(r,'ml_final_score'),0);
+  const ga=num(gv(r,'gap_pct'),0),hd=num(gv(r,'hod_distance'),0);
+  const tu=num(gv(r,'turnover_rate'),0),vw=num(gv(r,'vwap'),NaN),sp=num(gv(r,'spread_pct'),NaN);
+  const cc=ch>=0?'up':'down';const sw=Math.min(100,Math.max(0,cs)),mw=Math.min(100,Math.max(0,ml));
+  let pxCls='price';if(Number.isFinite(vw)&&vw>0){if(px>vw*1.001)pxCls='price above-vwap';else if(px<vw*0.999)pxCls='price below-vwap'}
+  return[
+    '<td class="pin-cell" data-act="pin"><span class="pin-star">'+(isPinned?'★':'☆')+'</span></td>',
+    '<td class="rank"><span class="rn">'+(gv(r,'master_rank')??'')+'</span></td>',
+    '<td class="sym" data-act="copy">'+sym+'<span class="copy-hint">Click to copy</span></td>',
+    '<td class="'+pxCls+'">$'+px.toFixed(2)+'</td>',
+    '<td class="chg '+cc+'">'+fP(ch)+'</td>',
+    '<td>'+linkCell(r)+'</td>',
+    '<td class="name" title="'+escAttr(gv(r,'name'))+'">'+(gv(r,'name')??'')+'</td>',
+    '<td class="sess">'+(gv(r,'session')??'')+'</td>',
+    '<td class="center">'+(gv(r,'best_preset')||'—')+'</td>',
+    '<td>'+presetT(gv(r,'presets_list'))+'</td>',
+    '<td class="center"><span class="sb"><span class="sf" style="width:'+sw+'%;background:'+sC(cs)+'"></span><span class="st">'+cs.toFixed(0)+'</span></span></td>',
+    '<td class="center"><span class="sb"><span class="sf" style="width:'+mw+'%;background:'+sC(ml)+'"></span><span class="st">'+ml.toFixed(0)+'</span></span></td>',
+    '<td class="center">'+archB(gv(r,'ml_archetype'))+'</td>',
+    '<td class="center">'+(gv(r,'ml_confidence')||'—')+'</td>',
+    '<td class="num" style="color:'+(ga>0?'var(--green)':'var(--txt2)')+'">'+fP(ga)+'</td>',
+    '<td class="num">'+(Number.isFinite(hd)?hd.toFixed(1)+'%':'—')+'</td>',
+    '<td class="num">'+fV(vo)+'</td>',
+    '<td class="num" style="color:'+(rv>=5?'var(--green)':rv>=2?'var(--yellow)':'var(--txt2)')+'">'+rv.toFixed(1)+'x</td>',
+    '<td class="num">'+(Number.isFinite(tu)?tu.toFixed(2)+'x':'—')+'</td>',
+    '<td class="num">'+(Number.isFinite(vw)?'$'+vw.toFixed(2):'—')+'</td>',
+    '<td class="num">'+(Number.isFinite(sp)?fP(sp):'—')+'</td>',
+    '<td>'+flagT(r)+'</td>',
+  ];
+}
+/* rows are keyed by symbol: a <tr> re-rendered for the same symbol only rewrites
+   the cells whose markup changed, and flashes them when the data was refreshed */
+function fillRow(tr,r,i,flash){
+  const sym=getSym(r),cells=rowCells(r),old=tr._cells;
+  if(!old||tr._sym!==sym||old.length!==cells.length)tr.innerHTML=cells.join('');
+  else for(let k=0;k<cells.length;k++){
+    if(cells[k]===old[k])continue;
+    tr.children[k].outerHTML=cells[k];
+    if(flash&&k)tr.children[k].classList.add('flash');
+  }
+  tr._cells=cells;tr._row=r;tr._sym=sym;tr.dataset.i=i;
+  tr.className=rowClass(r,i);
+  applyRowVisualQuality(tr,r);
+}
+/* indices of a longest increasing run of positions (-1 = node not yet placed) */
+function stablePositions(pos){
+  const tails=[],prev=new Array(pos.length).fill(-1),keep=new Set();
+  for(let j=0;j<pos.length;j++){
+    if(pos[j]<0)continue;
+    let lo=0,hi=tails.length;
+    while(lo<hi){const m=(lo+hi)>>1;if(pos[tails[m]]<pos[j])lo=m+1;else hi=m}
+    if(lo)prev[j]=tails[lo-1];
+    tails[lo]=j;
+  }
+  for(let j=tails.length?tails[tails.length-1]:-1;j>=0;j=prev[j])keep.add(j);
+  return keep;
+}
+/* Only the visible window plus OVERSCAN is in the DOM. Nodes follow their
+   symbol across scrolls, re-sorts and refreshes; nodes that stay in order are
+   never moved, the rest are moved once, and leftovers are recycled. */
+function paintRows(force,flash){
+  const wrap=document.getElementById('tableWrap'),tbody=document.getElementById('tbody'),n=shownRows.length;
+  let top=tbody.firstChild,bottom=tbody.lastChild;
+  if(!top||!top.classList.contains('vspacer')){
+    const sp='<tr class="vspacer"><td colspan="'+TABLE_COLS.length+'"></td></tr>';
+    tbody.innerHTML=sp+sp;top=tbody.firstChild;bottom=tbody.lastChild;
+  }
+  const h=rowH||22,visible=Math.ceil(wrap.clientHeight/h)+2*OVERSCAN;
+  let first=Math.max(0,Math.floor(wrap.scrollTop/h)-OVERSCAN);
+  if(first+visible>n)first=Math.max(0,n-visible);
+  const last=Math.min(n,first+visible);
+  if(!force&&first===vStart&&last===vEnd)return;
+  vStart=first;vEnd=last;
+  const bySym=new Map(),domPos=new Map(),free=[];
+  let p=0;
+  for(let tr=top.nextSibling;tr!==bottom;tr=tr.nextSibling){
+    domPos.set(tr,p++);
+    if(tr._sym!==undefined&&!bySym.has(tr._sym))bySym.set(tr._sym,tr);else free.push(tr);
+  }
+  const nodes=[],pos=[];
+  for(let i=first;i<last;i++){
+    const sym=getSym(shownRows[i]),tr=bySym.get(sym);
+    if(tr)bySym.delete(sym);
+    nodes.push(tr);pos.push(tr?domPos.get(tr):-1);
+  }
+  bySym.forEach(tr=>free.push(tr));
+  for(let j=0;j<nodes.length;j++){
+    const i=first+j,r=shownRows[i];let tr=nodes[j];
+    if(!tr){tr=nodes[j]=free.pop()||document.createElement('tr');fillRow(tr,r,i,false)}
+    else if(force||tr._row!==r||+tr.dataset.i!==i)fillRow(tr,r,i,flash);
+  }
+  free.forEach(tr=>{if(tr.parentNode===tbody)tbody.removeChild(tr)});
+  const keep=stablePositions(pos);
+  for(let j=nodes.length-1,next=bottom;j>=0;j--){
+    const tr=nodes[j];
+    if(!keep.has(j)||tr.parentNode!==tbody)tbody.insertBefore(tr,next);
+    next=tr;
+  }
+  if(!rowH&&last>first){
+    const a=top.nextSibling,b=bottom.previousSibling;
+    rowH=(b.offsetTop+b.offsetHeight-a.offsetTop)/(last-first)||22;
+    if(Math.abs(rowH-h)>1)queuePaint();
+  }
+  const hh=rowH||h;
+  top.style.display=first?'':'none';top.firstChild.style.height=(first*hh)+'px';
+  bottom.style.display=last<n?'':'none';bottom.firstChild.style.height=((n-last)*hh)+'px';
+}
+
+function selectedSymbol(){const r=shownRows[selectedIdx];return r?getSym(r):null}
+function restoreSelection(sym){selectedIdx=sym?filtered.slice(0,displayCount).findIndex(r=>getSym(r)===sym):-1}
+function render(flash){
+  shownRows=filtered.slice(0,displayCount);
+  const shown=shownRows;
+  paintRows(true,flash);
+  const nFilt=SERVER_MODE?serverMatched:filtered.length;
+  document.getElementById('countBadge').textContent=shown.length+' / '+nFilt;
   document.getElementById('fShown').textContent=shown.length;
-  document.getElementById('fFiltered').textContent=filtered.length;
-  document.getElementById('loadMoreWrap').style.display=shown.length<filtered.length?'block':'none';
+  document.getElementById('fFiltered').textContent=nFilt;
+  document.getElementById('loadMoreWrap').style.display=shown.length<nFilt?'block':'none';
   updateStats(shown);
 }
 
@@ -566,7 +937,18 @@ function exportCSV(){
 
 function buildDetailRow(l,v){return'<div class="dr"><span class="dl">'+l+'</span><span class="dv">'+v+'</span></div>'}
 
+/* rows only carry GRID_COLS: paint those at once, then the full row from /api/symbol */
+let detailSym=null;
 function openDetail(r){
+  const sym=getSym(r);detailSym=sym;renderDetail(r);
+  if(!sym)return;
+  fetch('/api/symbol/'+encodeURIComponent(sym)).then(resp=>resp.ok?resp.json():null).then(d=>{
+    if(!d||!Array.isArray(d.row)||detailSym!==sym||!document.getElementById('overlay').classList.contains('open'))return;
+    const grid=C;C={};(d.columns||[]).forEach((c,i)=>C[c]=i);
+    try{renderDetail(d.row)}finally{C=grid}
+  }).catch(()=>{});
+}
+function renderDetail(r){
   const ch=getEffChg(r),px=getEffPrice(r),cc=ch>=0?'up':'down',sym=getSym(r);
   const bid=num(gv(r,'bid_price'),NaN),ask=num(gv(r,'ask_price'),NaN),bsz=gv(r,'bid_size'),asz=gv(r,'ask_size');
   const spread=num(gv(r,'spread_pct'),NaN),rv=num(gv(r,'rel_volume'),0),gap=num(gv(r,'gap_pct'),0),hdd=num(gv(r,'hod_distance'),NaN);
@@ -599,7 +981,7 @@ function openDetail(r){
 
   document.getElementById('overlay').classList.add('open');
 }
-function closeDetail(){document.getElementById('overlay').classList.remove('open')}
+function closeDetail(){detailSym=null;document.getElementById('overlay').classList.remove('open')}
 
 function updateClock(){
   const now=new Date();
@@ -632,8 +1014,32 @@ app = Flask(__name__)
 
 DEFAULT_CSV_PATH = r"C:\Users\Nadir\Desktop\ROKKIE\screener_master.csv"
 DEFAULT_FOLDER = None
-CSV_PATH = None
-CSV_FOLDER = None
+CSV_PATH = os.environ.get('MAXXSCAN_CSV') or None
+CSV_FOLDER = os.environ.get('MAXXSCAN_FOLDER') or None
+INGEST_ENGINE = os.environ.get('MAXXSCAN_ENGINE', 'stdlib')
+WATCH = os.environ.get('MAXXSCAN_WATCH', '') not in ('', '0', 'false')
+WATCH_INTERVAL = float(os.environ.get('MAXXSCAN_WATCH_INTERVAL', '1.0'))
+WATCH_SETTLE = float(os.environ.get('MAXXSCAN_WATCH_SETTLE', '0.5'))
+SSE_HEARTBEAT = float(os.environ.get('MAXXSCAN_SSE_HEARTBEAT', '15'))
+SSE_MAX_AGE = float(os.environ.get('MAXXSCAN_SSE_MAX_AGE', '300'))
+DELTA_HISTORY = int(os.environ.get('MAXXSCAN_DELTA_HISTORY', '4'))
+QUERY_CACHE_SIZE = int(os.environ.get('MAXXSCAN_QUERY_CACHE', '32'))
+CSV_PATTERN = os.environ.get('MAXXSCAN_CSV_PATTERN', '*.csv')
+CSV_ORDER = os.environ.get('MAXXSCAN_CSV_ORDER', 'mtime')
+FOLDER_RESCAN = float(os.environ.get('MAXXSCAN_FOLDER_RESCAN', '5'))
+HISTORY_DIR = os.environ.get('MAXXSCAN_HISTORY_DIR') or None
+SHARED_DIR = os.environ.get('MAXXSCAN_SHARED_DIR') or None
+SHARED_PUBLISHER = os.environ.get('MAXXSCAN_SHARED_PUBLISHER') or None
+HISTORY_MAX_SNAPSHOTS = int(os.environ.get('MAXXSCAN_HISTORY_MAX', '96'))
+HISTORY_MAX_BYTES = int(float(os.environ.get('MAXXSCAN_HISTORY_MAX_MB', '256')) * 1024 * 1024)
+PROFILE_DIR = os.environ.get('MAXXSCAN_PROFILE_DIR') or None
+PROFILE_EVERY = int(os.environ.get('MAXXSCAN_PROFILE_EVERY', '0'))
+PROFILE_SECRET = os.environ.get('MAXXSCAN_PROFILE_SECRET') or None
+PROFILER = os.environ.get('MAXXSCAN_PROFILER', 'auto')
+PROFILE_MAX_BYTES = int(float(os.environ.get('MAXXSCAN_PROFILE_MAX_MB', '64')) * 1024 * 1024)
+SHARD_PATTERN = os.environ.get('MAXXSCAN_SHARD_PATTERN') or None
+SHARD_COUNT = int(os.environ.get('MAXXSCAN_SHARD_COUNT', '0'))
+SHARD_WORKERS = int(os.environ.get('MAXXSCAN_SHARD_WORKERS', '0'))
 
 COLUMNS = [
     'master_rank','symbol','name','exchange','sector','industry','session',
@@ -671,6 +1077,11 @@ NUMERIC_COLS = {
     'after_hours_vol','after_hours_high','after_hours_low',
 }
 
+INT_COLS = {
+    'master_rank','presets_passed','volume','vol_eff','avg_vol','avg_vol_10d','avg_vol_3m',
+    'bid_size','ask_size','after_hours_vol',
+}
+
 BOOLISH_COLS = {
     'gap_holding','flag_pm_active',
     'flag_hod','flag_thin_supply','flag_rvol5x','flag_big_move',
@@ -680,11 +1091,128 @@ BOOLISH_COLS = {
     'flag_session_reversal','flag_session_exhaustion',
 }
 
+# Folder index: CSV_FOLDER is listed with os.scandir and kept sorted between
+# requests, so a lookup costs one stat of the directory. When the directory
+# mtime moves it is re-listed, stat'ing only new names; every FOLDER_RESCAN
+# seconds (in-place rewrites leave the directory alone) or, with the inotify
+# watcher on the folder, on each reported change everything is re-stat'ed. CSV_ORDER 'name' sorts by a timestamp embedded in
+# the filename (20261018-0930, 2026-10-18T09-30-00, ...) and skips file stats.
+_FOLDER_INDEX = {"lock": threading.Lock(), "key": None, "dir_mtime_ns": None, "scanned": 0.0,
+                 "stale": True, "files": [], "paths": [], "scans": 0}
+_NAME_TS = re.compile(r'(\d{4})-?(\d{2})-?(\d{2})(?:[T_ .-]?(\d{2})[-:.]?(\d{2})(?:[-:.]?(\d{2}))?)?')
+
+def _name_timestamp(name):
+    m = _NAME_TS.search(name)
+    return tuple(int(g or 0) for g in m.groups()) if m else ()
+
+def _scan_folder(folder, pattern, order, known=None):
+    # like glob: case per os.path.normcase, dot-files only for dot patterns
+    match = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+    hidden = pattern.startswith('.')
+    known = known or {}
+    files = []
+    with os.scandir(folder) as it:
+        for e in it:
+            name = e.name
+            if not match(os.path.normcase(name)) or name[0] == '.' and not hidden:
+                continue
+            key = known.get(name)
+            if key is None:
+                try:
+                    if not e.is_file():
+                        continue
+                    key = _name_timestamp(name) if order == 'name' else e.stat().st_mtime_ns
+                except OSError:
+                    continue
+            files.append((key, name, e.path))
+    files.sort()
+    return files
+
+def invalidate_folder_index():
+    _FOLDER_INDEX["stale"] = True
+
+def folder_csvs(folder):
+    idx = _FOLDER_INDEX
+    key = (os.path.abspath(folder), CSV_PATTERN, CSV_ORDER)
+    with idx["lock"]:
+        full = idx["key"] != key or idx["stale"]
+        if not full and _folder_watched(key[0]):
+            return idx["paths"]
+        full = full or time.monotonic() - idx["scanned"] >= FOLDER_RESCAN
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            mtime = None
+        if full or mtime != idx["dir_mtime_ns"]:
+            idx["stale"] = False
+            known = None if full else {name: k for k, name, _ in idx["files"]}
+            try:
+                idx["files"] = _scan_folder(folder, CSV_PATTERN, CSV_ORDER, known)
+            except OSError:
+                idx["files"] = []
+            idx["paths"] = [f[2] for f in idx["files"]]
+            idx["key"], idx["dir_mtime_ns"] = key, mtime
+            if full:
+                idx["scanned"] = time.monotonic()
+            idx["scans"] += 1
+        return idx["paths"]
+
+def folder_index_status():
+    idx = _FOLDER_INDEX
+    return {"pattern": CSV_PATTERN, "order": CSV_ORDER, "files": len(idx["files"]), "scans": idx["scans"],
+            "watched": bool(idx["key"]) and _folder_watched(idx["key"][0])}
+
 def find_latest_csv(folder):
-    files = glob.glob(os.path.join(folder, "*.csv"))
-    return max(files, key=os.path.getmtime) if files else None
+    files = folder_csvs(folder)
+    return files[-1] if files else None
+
+# Sharded runs (MAXXSCAN_SHARD_PATTERN): the screener may write one run as
+# several CSVs in CSV_FOLDER (one per exchange, per preset, ...). Names are
+# grouped into runs by the pattern's "run" group (else its first group, else
+# the whole match); a run is as new as its newest shard, and only runs with at
+# least SHARD_COUNT shards count. Shards keep folder order, newest last.
+_SHARD_RX = {"pattern": None, "rx": None}
+
+def _shard_rx():
+    # compiled once per SHARD_PATTERN value (the CLI may replace it after import)
+    if _SHARD_RX["pattern"] != SHARD_PATTERN:
+        _SHARD_RX.update(pattern=SHARD_PATTERN, rx=re.compile(SHARD_PATTERN))
+    return _SHARD_RX["rx"]
+
+def _shard_run(name):
+    rx = _shard_rx()
+    m = rx.search(name)
+    if not m:
+        return None
+    return m.group('run') if 'run' in rx.groupindex else m.group(1) if rx.groups else m.group(0)
+
+def shard_runs(paths):
+    runs, last = {}, {}
+    for i, path in enumerate(paths):
+        run = _shard_run(os.path.basename(path))
+        if run is not None:
+            runs.setdefault(run, []).append(path)
+            last[run] = i
+    return [(run, tuple(runs[run])) for run in sorted(runs, key=last.get) if len(runs[run]) >= SHARD_COUNT]
+
+def find_latest_run(folder):
+    runs = shard_runs(folder_csvs(folder))
+    return runs[-1][1] if runs else None
+
+def _sharded():
+    return bool(SHARD_PATTERN and CSV_FOLDER and os.path.isdir(CSV_FOLDER))
+
+def get_csv_source():
+    # what a snapshot is parsed from: one path, or a tuple with every shard of the latest run
+    return find_latest_run(CSV_FOLDER) if _sharded() else get_csv_path()
+
+def _stat_source(path):
+    return tuple(map(os.stat, path)) if isinstance(path, tuple) else os.stat(path)
 
 def get_csv_path():
+    if _sharded():
+        run = find_latest_run(CSV_FOLDER)
+        return run[-1] if run else None
     if CSV_FOLDER and os.path.isdir(CSV_FOLDER):
         path = find_latest_csv(CSV_FOLDER)
         if path:
@@ -696,23 +1224,179 @@ def get_csv_path():
     local = os.path.join(APP_DIR, "screener_master.csv")
     return local if os.path.isfile(local) else None
 
-def _coerce_numeric(col, v):
-    if v is None:
-        return 0
-    s = str(v).strip().strip('\r')
-    if s == '' or s.lower() in ('nan','none','null'):
+# Metrics: per-phase timers (resolve, read, parse, coerce, index, serialize,
+# write), counters and per-route latency histograms, all per process and
+# exported at /api/metrics in Prometheus text format.
+_METRIC_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_METRICS = {"lock": threading.Lock(), "hist": {}, "counters": collections.Counter()}
+
+def _observe(name, labels, seconds):
+    key = (name, labels)
+    with _METRICS["lock"]:
+        h = _METRICS["hist"].get(key)
+        if h is None:
+            h = _METRICS["hist"][key] = [0] * (len(_METRIC_BUCKETS) + 2)
+        h[bisect.bisect_left(_METRIC_BUCKETS, seconds)] += 1
+        h[-1] += seconds
+
+def observe_phase(phase, seconds):
+    _observe("maxxscan_phase_seconds", (("phase", phase),), seconds)
+
+def _inc(name, n=1):
+    with _METRICS["lock"]:
+        _METRICS["counters"][name] += n
+
+@contextlib.contextmanager
+def timed_phase(phase):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_phase(phase, time.perf_counter() - t0)
+
+def _timed_call(phase, fn, *args):
+    with timed_phase(phase):
+        return fn(*args)
+
+class _TimedReader(io.RawIOBase):
+    """Raw file reader that adds up time and bytes spent in read syscalls."""
+
+    def __init__(self, path):
+        self.raw = open(path, 'rb', buffering=0)
+        self.seconds = 0.0
+        self.bytes = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        t0 = time.perf_counter()
+        n = self.raw.readinto(b)
+        self.seconds += time.perf_counter() - t0
+        self.bytes += n or 0
+        return n
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+def _open_timed(path, encoding):
+    reader = _TimedReader(path)
+    return reader, io.TextIOWrapper(io.BufferedReader(reader, 1 << 16), encoding=encoding, errors='replace', newline='')
+
+_METRIC_FAMILIES = (
+    ("maxxscan_phase_seconds", "histogram", "Time spent per load/serve phase."),
+    ("maxxscan_http_request_duration_seconds", "histogram", "Request handling time per route, method and status."),
+)
+_COUNTER_HELP = {
+    "rows_parsed": "CSV rows parsed into snapshots.",
+    "bytes_read": "CSV bytes read while parsing.",
+    "bytes_served": "Response body bytes sent, after compression.",
+    "parse_errors": "CSV loads that failed.",
+}
+
+def _prom_labels(labels):
+    if not labels:
+        return ''
+    esc = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{esc(v)}"' for k, v in labels) + '}'
+
+def metrics_text():
+    with _METRICS["lock"]:
+        hist = {k: list(v) for k, v in _METRICS["hist"].items()}
+        counters = dict(_METRICS["counters"])
+    lines = []
+    for family, kind, help_ in _METRIC_FAMILIES:
+        lines += [f"# HELP {family} {help_}", f"# TYPE {family} {kind}"]
+        for (name, labels), h in sorted(hist.items()):
+            if name != family:
+                continue
+            total = 0
+            for le, n in zip((*(f"{b:g}" for b in _METRIC_BUCKETS), "+Inf"), h):
+                total += n
+                lines.append(f"{name}_bucket{_prom_labels((*labels, ('le', le)))} {total}")
+            lines.append(f"{name}_sum{_prom_labels(labels)} {h[-1]:.6f}")
+            lines.append(f"{name}_count{_prom_labels(labels)} {total}")
+    stats = snapshot_stats()
+    for name, value, help_ in (("snapshot_cache_hits", stats["hits"], "Requests served from the cached snapshot."),
+                               ("snapshot_cache_misses", stats["misses"], "Requests that found the snapshot stale."),
+                               ("snapshot_rebuilds", stats["rebuilds"], "Snapshots parsed from CSV."),
+                               *((k, counters.get(k, 0), v) for k, v in _COUNTER_HELP.items())):
+        lines += [f"# HELP maxxscan_{name}_total {help_}", f"# TYPE maxxscan_{name}_total counter",
+                  f"maxxscan_{name}_total {value}"]
+    payload = _SNAPSHOT["payload"] or {}
+    lines += ["# HELP maxxscan_snapshot_rows Rows in the live snapshot.", "# TYPE maxxscan_snapshot_rows gauge",
+              f"maxxscan_snapshot_rows {payload.get('total') or 0}"]
+    return "\n".join(lines) + "\n"
+
+def _observe_read(reader, parse_seconds):
+    # csv.reader pulls file reads while it tokenizes; split that time back out
+    observe_phase("read", reader.seconds)
+    observe_phase("parse", max(0.0, parse_seconds - reader.seconds))
+    _inc("bytes_read", reader.bytes)
+
+# Coercion runs through a plan built once per header layout: one
+# (source index, converter) pair per output column, in COLUMNS order.
+_TRUE_TOKENS = frozenset(('true','1','yes','y','t'))
+_BOOL_FAST = {'True': True, 'true': True, '1': True, 'False': False, 'false': False, '0': False, '': False}
+_PLAN_CACHE = {}
+
+def _to_int(v):
+    if len(v) < 16:
+        try:
+            return int(v)
+        except ValueError:
+            pass
+    try:
+        f = float(v)
+        return 0 if f != f else int(f)
+    except (ValueError, OverflowError):
         return 0
+
+def _to_float(v):
     try:
-        if col in {'master_rank','presets_passed','volume','vol_eff','avg_vol','avg_vol_10d','avg_vol_3m','bid_size','ask_size','after_hours_vol'}:
-            return int(float(s))
-        return round(float(s), 6)
-    except (ValueError, TypeError):
+        f = float(v)
+    except ValueError:
+        return 0
+    if f != f:
         return 0
+    # float() of a plain decimal with <= 6 fractional digits already equals round(f, 6)
+    d = v.find('.')
+    if (d < 0 or len(v) - d <= 7) and 'e' not in v and 'E' not in v:
+        return f
+    return round(f, 6)
+
+def _to_bool(v):
+    b = _BOOL_FAST.get(v)
+    if b is None:
+        return v.strip().lower() in _TRUE_TOKENS
+    return b
 
-def _coerce_boolish(v):
-    if v is None:
-        return False
-    return str(v).strip().lower() in ('true','1','yes','y','t')
+def _converter(col):
+    if col in INT_COLS:
+        return _to_int
+    if col in NUMERIC_COLS:
+        return _to_float
+    if col in BOOLISH_COLS:
+        return _to_bool
+    return str.strip
+
+def coercion_plan(header):
+    key = tuple(header)
+    plan = _PLAN_CACHE.get(key)
+    if plan is None:
+        pos = {h: i for i, h in enumerate(header)}
+        plan = []
+        for col in COLUMNS:
+            conv, i = _converter(col), pos.get(col)
+            if i is None:
+                plan.append((0, lambda v, d=conv(''): d))
+            else:
+                plan.append((i, conv))
+        if len(_PLAN_CACHE) > 32:
+            _PLAN_CACHE.clear()
+        plan = _PLAN_CACHE[key] = tuple(plan)
+    return plan
 
 def _empty_api_payload(error_msg=None):
     return {
@@ -726,87 +1410,1720 @@ def _empty_api_payload(error_msg=None):
         "error": error_msg
     }
 
+# Sniff the encoding once from a prefix; undecodable bytes past it are replaced.
+def _detect_encoding(path, probe=65536):
+    with open(path, 'rb') as f:
+        head = f.read(probe)
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+# Records are tokenized and coerced in chunks of _PARSE_CHUNK so the two
+# phases can be timed apart without a clock call per row.
+_PARSE_CHUNK = 1024
+
+def _rows_stdlib(path, encoding):
+    timed, f = _open_timed(path, encoding)
+    coerce = 0.0
+    with f:
+        t0 = time.perf_counter()
+        reader = csv.reader(f)
+        header = [str(h).strip().strip('\ufeff') for h in next(reader, [])]
+        plan = coercion_plan(header)
+        width = len(header)
+        rows = []
+        parse = time.perf_counter() - t0
+        while True:
+            t1 = time.perf_counter()
+            chunk = list(itertools.islice(reader, _PARSE_CHUNK))
+            t2 = time.perf_counter()
+            parse += t2 - t1
+            if not chunk:
+                break
+            for rec in chunk:
+                if not rec:
+                    continue
+                if len(rec) < width:
+                    rec += [''] * (width - len(rec))
+                rows.append([conv(rec[i]) for i, conv in plan])
+            coerce += time.perf_counter() - t2
+    _observe_read(timed, parse)
+    observe_phase("coerce", coerce)
+    return rows
+
+# Bulk engine: Arrow tokenizes and casts whole columns; NumPy finishes the
+# numeric columns. Results must match _rows_stdlib value-for-value (including
+# int 0 for blank floats), so anything Arrow cannot cast drops back to the
+# per-cell converters.
+def _np_numbers(conv, f, null):
+    if conv is _to_int:
+        bad = null | ~np.isfinite(f)
+        f[bad] = 0
+        if (np.abs(f) >= 2.0 ** 63).any():
+            return None
+        return np.trunc(f).astype(np.int64).tolist()
+    bad = null | np.isnan(f)
+    f[bad] = 0
+    # np.round(f, 6) == f implies Python's round(f, 6) == f; round the rest exactly.
+    need = np.round(f, 6) != f
+    out = f.tolist()
+    for i in np.flatnonzero(need).tolist():
+        out[i] = round(out[i], 6)
+    for i in np.flatnonzero(bad).tolist():
+        out[i] = 0
+    return out
+
+# The bulk engine allocates millions of acyclic containers at once; pausing the
+# cyclic collector avoids repeated full-heap scans while it does.
+@contextlib.contextmanager
+def _gc_paused():
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+def _rows_from_columns(header, cols, n, column):
+    pos = {h: i for i, h in enumerate(header)}
+    out = []
+    for col in COLUMNS:
+        conv, i = _converter(col), pos.get(col)
+        out.append([conv('')] * n if i is None else column(conv, cols[i]))
+    return list(map(list, zip(*out)))
+
+# Arrow casts numerics natively; it is stricter than float() (no padding, no
+# underscores), so a failed cast just sends that column through the converter.
+# Booleans are matched against _BOOL_FAST's forms; other spellings go per cell.
+def _pa_column(conv, arr):
+    if conv is _to_bool:
+        out = pc.is_in(arr, value_set=pa.array([k for k, v in _BOOL_FAST.items() if v])).to_pylist()
+        odd = pc.invert(pc.is_in(arr, value_set=pa.array(list(_BOOL_FAST))))
+        for i in np.flatnonzero(odd.to_numpy(zero_copy_only=False)).tolist():
+            out[i] = _to_bool(arr[i].as_py())
+        return out
+    if conv is _to_int or conv is _to_float:
+        null = pc.equal(arr, '')
+        try:
+            f = pc.cast(pc.if_else(null, pa.scalar(None, pa.string()), arr), pa.float64())
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            f = None
+        out = None if f is None else _np_numbers(conv, f.fill_null(0).to_numpy().copy(), null.to_numpy(zero_copy_only=False))
+        if out is not None:
+            return out
+    return [conv(v) for v in arr.to_pylist()]
+
+def _rows_pyarrow(path, encoding):
+    if encoding not in ('utf-8', 'utf-8-sig'):
+        return _rows_stdlib(path, encoding)
+    with open(path, 'r', encoding=encoding, errors='replace', newline='') as f:
+        raw_header = next(csv.reader(f), [])
+    try:
+        # Arrow reads, decodes and tokenizes in one call; it all counts as parse
+        with timed_phase("parse"):
+            table = pa_csv.read_csv(
+                path,
+                parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                convert_options=pa_csv.ConvertOptions(column_types={h: pa.string() for h in raw_header}),
+            )
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # ragged rows, invalid UTF-8, duplicate headers: let csv.reader handle them
+        return _rows_stdlib(path, encoding)
+    _inc("bytes_read", os.path.getsize(path))
+    if any(t != pa.string() for t in table.schema.types):
+        return _rows_stdlib(path, encoding)
+    header = [str(h).strip().strip('\ufeff') for h in table.column_names]
+    cols = [table.column(i).combine_chunks() for i in range(table.num_columns)]
+    with _gc_paused(), timed_phase("coerce"):
+        return _rows_from_columns(header, cols, table.num_rows, column=_pa_column)
+
+_ENGINES = {"stdlib": _rows_stdlib}
+if np is not None and pa_csv is not None:
+    _ENGINES["pyarrow"] = _rows_pyarrow
+
+def _csv_payload(rows, path, st, used_encoding):
+    return {
+        "rows": rows,
+        "columns": COLUMNS,
+        "col_index": {c:i for i,c in enumerate(COLUMNS)},
+        "schema": {"numeric_cols": sorted(NUMERIC_COLS), "boolish_cols": sorted(BOOLISH_COLS)},
+        "total": len(rows),
+        "file": os.path.basename(path),
+        "full_path": path,
+        "modified": datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+        "size_kb": round(st.st_size/1024, 1),
+        "encoding": used_encoding,
+        "error": None
+    }
+
+def _parse_error(path, e):
+    _inc("parse_errors")
+    print(f"\n!!! ERROR loading CSV: {e}")
+    traceback.print_exc()
+    p = _empty_api_payload(f"{type(e).__name__}: {e}")
+    p["file"] = os.path.basename(path) if path else None
+    return p
+
+def _parse_csv(path, st):
+    if isinstance(path, tuple):
+        return _parse_shards(path, st)
+    try:
+        used_encoding = _detect_encoding(path)
+        rows = _ENGINES.get(INGEST_ENGINE, _rows_stdlib)(path, used_encoding)
+        return _csv_payload(rows, path, st, used_encoding)
+    except Exception as e:
+        return _parse_error(path, e)
+
+# Shards are parsed one per process (SHARD_WORKERS, 0 = one per core) with the
+# same engines and coercion, each sorted by master_rank (unranked rows last)
+# in its worker, then k-way merged. A symbol present in several shards keeps
+# its best-ranked row. Phase timers and counters inside workers stay there;
+# the parent records "merge" and the bytes read. Without a usable process
+# pool (sandboxes without semaphores, a broken pool) shards parse inline.
+_RANK = COLUMNS.index('master_rank')
+_SHARD_POOL = {"pool": None, "lock": threading.Lock(), "parses": 0, "fallbacks": 0}
+
+def _rank_key(row):
+    r = row[_RANK]
+    return (not r > 0, r)
+
+def _parse_shard(path, engine):
+    used_encoding = _detect_encoding(path)
+    rows = _ENGINES.get(engine, _rows_stdlib)(path, used_encoding)
+    rows.sort(key=_rank_key)
+    return rows, used_encoding
+
+def _shard_workers():
+    return SHARD_WORKERS or os.cpu_count() or 1
+
+def _map_shards(paths):
+    if len(paths) < 2 or _shard_workers() < 2:
+        return [_parse_shard(p, INGEST_ENGINE) for p in paths]
+    try:
+        with _SHARD_POOL["lock"]:
+            pool = _SHARD_POOL["pool"]
+            if pool is None:
+                pool = _SHARD_POOL["pool"] = concurrent.futures.ProcessPoolExecutor(max_workers=_shard_workers())
+        out = list(pool.map(_parse_shard, paths, itertools.repeat(INGEST_ENGINE)))
+        with _SHARD_POOL["lock"]:
+            _SHARD_POOL["parses"] += 1
+        return out
+    except (OSError, NotImplementedError, concurrent.futures.process.BrokenProcessPool) as e:
+        with _SHARD_POOL["lock"]:
+            _SHARD_POOL["pool"] = None
+            _SHARD_POOL["fallbacks"] += 1
+        print(f"  ⚠  shard pool unavailable ({type(e).__name__}: {e}) — parsing shards inline")
+        return [_parse_shard(p, INGEST_ENGINE) for p in paths]
+
+def _merge_shards(shards):
+    si = COLUMNS.index('symbol')
+    rows, seen, dups = [], set(), 0
+    for row in heapq.merge(*shards, key=_rank_key):
+        sym = row[si]
+        if sym:
+            if sym in seen:
+                dups += 1
+                continue
+            seen.add(sym)
+        rows.append(row)
+    return rows, dups
+
+def _parse_shards(paths, sts):
+    try:
+        shards = sorted(zip(paths, sts), key=lambda s: s[0])
+        parsed = _map_shards([p for p, _ in shards])
+        _inc("bytes_read", sum(st.st_size for _, st in shards))
+        with timed_phase("merge"):
+            rows, dups = _merge_shards([r for r, _ in parsed])
+        newest, newest_st = max(shards, key=lambda s: s[1].st_mtime_ns)
+        payload = _csv_payload(rows, newest, newest_st, ",".join(sorted({enc for _, enc in parsed})))
+        payload.update(
+            file=f"{_shard_run(os.path.basename(newest)) or os.path.basename(newest)} ({len(shards)} shards)",
+            size_kb=round(sum(st.st_size for _, st in shards)/1024, 1),
+            shards=[{"file": os.path.basename(p), "rows": len(r), "encoding": enc}
+                    for (p, _), (r, enc) in zip(shards, parsed)],
+            duplicates=dups)
+        return payload
+    except Exception as e:
+        return _parse_error(paths[-1] if paths else None, e)
+
+# Parsed payloads are reused until the file identity (path, mtime_ns, size, inode)
+# changes; concurrent misses queue on _SNAPSHOT_LOCK so only one of them parses.
+# Anything derived from a snapshot (encoded bodies, ...) lives in its "artifacts".
+_SNAPSHOT_LOCK = threading.Lock()
+_STATS_LOCK = threading.Lock()
+_SNAPSHOT = {"key": None, "id": None, "payload": None, "artifacts": {}, "lock": threading.RLock()}
+_SNAPSHOT_CHANGED = threading.Condition()
+# recent snapshots, oldest first, kept for /api/data/delta
+_RECENT = collections.deque(maxlen=max(1, DELTA_HISTORY))
+SNAPSHOT_STATS = {"hits": 0, "misses": 0, "rebuilds": 0, "last_rebuild_ms": None, "total_rebuild_ms": 0.0}
+
+def _file_key(path, st):
+    if isinstance(path, tuple):
+        return tuple(map(_file_key, path, st))
+    return (path, st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _snapshot_id(key):
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+
+def _new_snapshot(key, payload):
+    sid = _snapshot_id(key) if key else None
+    if sid:
+        payload["snapshot_id"] = sid
+    return {"key": key, "id": sid, "payload": payload, "artifacts": {}, "lock": threading.RLock()}
+
+def _count(name, n=1):
+    with _STATS_LOCK:
+        SNAPSHOT_STATS[name] += n
+
+def get_snapshot():
+    if SHARED_DIR:
+        return _resolve_shared()
+    # With the watcher running, requests never parse once a snapshot exists.
+    snap = _SNAPSHOT
+    if snap["id"] is not None and watcher_running():
+        _count("hits")
+        return snap
+    return _resolve_snapshot()
+
+def _stat_csv():
+    with timed_phase("resolve"):
+        path = get_csv_source()
+    if not path or not isinstance(path, tuple) and not os.path.isfile(path):
+        return None, None, _new_snapshot(None, _empty_api_payload(f"CSV not found. path: {CSV_PATH}, folder: {CSV_FOLDER}, app: {APP_DIR}"))
+    try:
+        return path, _stat_source(path), None
+    except OSError as e:
+        p = _empty_api_payload(f"{type(e).__name__}: {e}")
+        p["file"] = os.path.basename(e.filename or (path[-1] if isinstance(path, tuple) else path))
+        return None, None, _new_snapshot(None, p)
+
+def _timed_parse(path, st):
+    t0 = time.perf_counter()
+    payload = _parse_csv(path, st)
+    ms = round((time.perf_counter() - t0) * 1000, 2)
+    _inc("rows_parsed", payload["total"])
+    with _STATS_LOCK:
+        SNAPSHOT_STATS["rebuilds"] += 1
+        SNAPSHOT_STATS["last_rebuild_ms"] = ms
+        SNAPSHOT_STATS["total_rebuild_ms"] = round(SNAPSHOT_STATS["total_rebuild_ms"] + ms, 2)
+    return payload
+
+def _resolve_snapshot():
+    global _SNAPSHOT
+    if SHARED_DIR:
+        return _resolve_shared()
+    path, st, err = _stat_csv()
+    if err is not None:
+        return err
+    key = _file_key(path, st)
+    snap = _SNAPSHOT
+    if snap["key"] == key:
+        _count("hits")
+        return snap
+    with _SNAPSHOT_LOCK:
+        snap = _SNAPSHOT
+        if snap["key"] == key:
+            _count("hits")
+            return snap
+        _count("misses")
+        payload = _timed_parse(path, st)
+        if payload["error"] is not None:
+            return _new_snapshot(None, payload)
+        snap = _new_snapshot(key, payload)
+        snapshot_artifact(snap, "index", _build_index)
+        _SNAPSHOT = snap
+        _RECENT.append(snap)
+        if HISTORY_DIR:
+            archive_snapshot(snap)
+        with _SNAPSHOT_CHANGED:
+            _SNAPSHOT_CHANGED.notify_all()
+        return snap
+
 def load_csv_data():
-    path = get_csv_path()
-    if not path or not os.path.isfile(path):
-        return _empty_api_payload(f"CSV not found. path: {CSV_PATH}, folder: {CSV_FOLDER}, app: {APP_DIR}")
+    return get_snapshot()["payload"]
+
+def snapshot_stats():
+    with _STATS_LOCK:
+        return dict(SNAPSHOT_STATS)
+
+def snapshot_artifact(snap, name, build):
+    arts = snap["artifacts"]
+    if name not in arts:
+        with snap["lock"]:
+            if name not in arts:
+                arts[name] = build(snap)
+    return arts[name]
+
+# Response bodies are encoded once per snapshot and per variant, then served by
+# Accept-Encoding with a strong ETag derived from the snapshot id.
+def _encode_bodies(raw, gzip_level=6, br_quality=5):
+    bodies = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=gzip_level, mtime=0)}
+    if brotli is not None:
+        bodies["br"] = brotli.compress(raw, quality=br_quality)
+    return bodies
+
+def _json_body(payload):
+    return _encode_bodies((app.json.dumps(payload, separators=(",", ":")) + "\n").encode('utf-8'))
+
+def _json_bodies(snap):
+    return _json_body(snap["payload"])
+
+# Columnar layout: numerics as little-endian int64/float64 buffers, flags as a
+# packed bitset (bit i = row i) and repetitive strings as dictionary + indices.
+def _le_bytes(arr):
+    if sys.byteorder != 'little':
+        arr = array.array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+def _pack_bits(values):
+    bits = int(''.join('1' if v else '0' for v in reversed(values)) or '0', 2)
+    return bits.to_bytes((len(values) + 7) // 8, 'little')
+
+def columnar_columns(rows, dict_all=False, columns=COLUMNS):
+    cols = list(zip(*rows)) if rows else [()] * len(columns)
+    out = []
+    for col, vals in zip(columns, cols):
+        if col in NUMERIC_COLS:
+            if col in INT_COLS:
+                try:
+                    out.append((col, 'i64', array.array('q', vals)))
+                    continue
+                except (OverflowError, TypeError):
+                    pass
+            out.append((col, 'f64', array.array('d', vals)))
+        elif col in BOOLISH_COLS:
+            out.append((col, 'bits', _pack_bits(vals)))
+        else:
+            uniq = {}
+            idx = [uniq.setdefault(v, len(uniq)) for v in vals]
+            if dict_all or len(uniq) * 2 <= len(vals):
+                code = 'B' if len(uniq) <= 0xff else 'H' if len(uniq) <= 0xffff else 'I'
+                out.append((col, 'dict', (list(uniq), array.array(code, idx))))
+            else:
+                out.append((col, 'str', list(vals)))
+    return out
+
+_IDX_TYPES = {'B': 'u8', 'H': 'u16', 'I': 'u32'}
+
+# Wire-only narrowing: constant columns collapse to one value and integral
+# columns that fit int32 ship at half width.
+def _narrow_numeric(arr):
+    if len(arr) and arr.count(arr[0]) == len(arr):
+        return (arr[0],)
+    try:
+        ints = [int(v) for v in arr]
+        if arr.typecode == 'q' or all(a == b for a, b in zip(ints, arr)):
+            return array.array('i', ints)
+    except (OverflowError, ValueError):
+        pass
+    return None
+
+def _columnar_body(payload, columns=COLUMNS):
+    b64 = lambda b: base64.b64encode(b).decode('ascii')
+    data = {}
+    for col, kind, v in columnar_columns(payload["rows"], columns=columns):
+        if kind in ('i64', 'f64'):
+            narrow = _narrow_numeric(v)
+            if narrow is None:
+                data[col] = {"t": kind, "b64": b64(_le_bytes(v))}
+            elif isinstance(narrow, array.array):
+                data[col] = {"t": "i32", "b64": b64(_le_bytes(narrow))}
+            else:
+                data[col] = {"t": "const", "v": narrow[0]}
+        elif kind == 'bits':
+            data[col] = {"t": kind, "b64": b64(v)}
+        elif kind == 'dict':
+            data[col] = {"t": kind, "dict": v[0], "idx": {"t": _IDX_TYPES[v[1].typecode], "b64": b64(_le_bytes(v[1]))}}
+        else:
+            data[col] = {"t": kind, "v": v}
+    out = {k: v for k, v in payload.items() if k != "rows"}
+    out["format"] = "columnar"
+    out["data"] = data
+    return _json_body(out)
+
+def _columnar_bodies(snap):
+    return _columnar_body(snap["payload"])
+
+_DATA_FORMATS = {"json": _json_bodies, "columnar": _columnar_bodies}
+
+# Binary feeds for programmatic consumers, picked by ?format= or the Accept
+# header and built lazily per snapshot (shared mode does not pre-encode them).
+# msgpack mirrors the JSON payload with float columns as float64 and flags as
+# booleans; arrow is an IPC stream of one record batch typed int64/float64/
+# bool/dictionary<string>/string, with the payload metadata as JSON under the
+# schema metadata key b"maxxscan".
+def _msgpack_body(payload, columns=COLUMNS):
+    rows = payload["rows"]
+    floats = [i for i, c in enumerate(columns) if c in NUMERIC_COLS and c not in INT_COLS]
+    if rows and floats:
+        cols = list(zip(*rows))
+        for i in floats:
+            cols[i] = map(float, cols[i])
+        rows = list(zip(*cols))
+    out = {k: v for k, v in payload.items() if k != "rows"}
+    out["format"] = "msgpack"
+    out["rows"] = rows
+    return msgpack.packb(out, use_bin_type=True)
+
+def _arrow_body(payload, columns=COLUMNS):
+    n, arrays = len(payload["rows"]), []
+    idx_types = {'B': pa.uint8(), 'H': pa.uint16(), 'I': pa.uint32()}
+    for col, kind, v in columnar_columns(payload["rows"], columns=columns):
+        if kind in ('i64', 'f64'):
+            arrays.append(pa.Array.from_buffers(pa.int64() if kind == 'i64' else pa.float64(), n, [None, pa.py_buffer(_le_bytes(v))]))
+        elif kind == 'bits':
+            arrays.append(pa.Array.from_buffers(pa.bool_(), n, [None, pa.py_buffer(v)]))
+        elif kind == 'dict':
+            ix = pa.Array.from_buffers(idx_types[v[1].typecode], n, [None, pa.py_buffer(_le_bytes(v[1]))])
+            arrays.append(pa.DictionaryArray.from_arrays(ix, pa.array(v[0], pa.string())))
+        else:
+            arrays.append(pa.array(v, pa.string()))
+    meta = {k: v for k, v in payload.items() if k not in ("rows", "columns", "col_index")}
+    batch = pa.RecordBatch.from_arrays(arrays, names=list(columns))
+    schema = batch.schema.with_metadata({b"maxxscan": app.json.dumps(meta).encode('utf-8')})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+_FEED_FORMATS = {
+    "msgpack": {"mimetype": "application/x-msgpack", "accept": ("application/x-msgpack", "application/msgpack", "application/vnd.msgpack"),
+                "body": _msgpack_body, "available": lambda: msgpack is not None, "needs": "msgpack"},
+    "arrow": {"mimetype": "application/vnd.apache.arrow.stream", "accept": ("application/vnd.apache.arrow.stream",),
+              "body": _arrow_body, "available": lambda: pa is not None, "needs": "pyarrow"},
+}
+
+def _negotiate_format():
+    offers = ['application/json'] + [m for f in _FEED_FORMATS.values() if f["available"]() for m in f["accept"]]
+    best = request.accept_mimetypes.best_match(offers, default='application/json')
+    return next((name for name, f in _FEED_FORMATS.items() if best in f["accept"]), 'json')
+
+def _feed_bodies(fmt, payload, columns=COLUMNS):
+    return _encode_bodies(_FEED_FORMATS[fmt]["body"](payload, columns))
+
+def _pick_encoding(bodies):
+    accept = request.accept_encodings
+    for enc in ('br', 'gzip'):
+        if enc in bodies and accept[enc] > 0:
+            return enc
+    return 'identity'
+
+def snapshot_response(snap, variant, build, mimetype='application/json'):
+    bodies = snapshot_artifact(snap, "bodies:" + variant, lambda s: _timed_call("serialize", build, s))
+    return _bodies_response(snap, variant, bodies, mimetype)
+
+def _bodies_response(snap, variant, bodies, mimetype='application/json'):
+    enc = _pick_encoding(bodies)
+    etag = snap["id"] + ("" if variant == "json" else "-" + variant) + ("" if enc == 'identity' else "-" + enc)
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(bodies[enc], mimetype=mimetype)
+        if enc != 'identity':
+            resp.headers['Content-Encoding'] = enc
+    resp.set_etag(etag)
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+# Column projection: ?cols=a,b,c (or cols=*) ships only those columns, symbol
+# always included. lnk_* columns are mostly one URL pattern over symbol and
+# exchange, so projected payloads send each as {"t": template, "x": {symbol:
+# url}} with overrides only where a row deviates. "columns"/"col_index"
+# describe the remaining row layout; clients append "link_columns" after it.
+# Bodies are cached per snapshot in a small LRU, since the column list comes
+# from the client.
+_LINK_COLS = tuple(c for c in COLUMNS if c.startswith('lnk_'))
+_LINK_FIELDS = ('symbol', 'exchange')
+_LINK_SAMPLE = 1000
+
+def _parse_cols(args):
+    raw = args.get('cols')
+    if raw is None:
+        return None
+    want = set(COLUMNS) if raw.strip() == '*' else {c.strip() for c in raw.split(',') if c.strip()}
+    if want - set(COLUMNS):
+        raise ValueError(f"Unknown column: {','.join(sorted(want - set(COLUMNS)))}")
+    want.add('symbol')
+    if want.intersection(_LINK_COLS):
+        want.update(_LINK_FIELDS)
+    return tuple(c for c in COLUMNS if c in want)
+
+def _cols_tag(cols):
+    return "c" + hashlib.sha1(",".join(cols).encode('utf-8')).hexdigest()[:12]
+
+def _render_link(template, values):
+    for name, v in zip(_LINK_FIELDS, values):
+        template = template.replace('{' + name + '}', v)
+    return template
+
+def _link_templates(snap):
+    # overrides are keyed by symbol, so repeated or blank symbols get no templates
+    if snapshot_artifact(snap, "by_symbol", _rows_by_symbol) is None:
+        return None
+    rows = snap["payload"]["rows"]
+    si = COLUMNS.index('symbol')
+    keys = [tuple(str(r[COLUMNS.index(f)]) for f in _LINK_FIELDS) for r in rows]
+    out = {}
+    for col in _LINK_COLS:
+        j = COLUMNS.index(col)
+        votes = collections.Counter()
+        for r, vals in itertools.islice(((r, k) for r, k in zip(rows, keys) if r[j]), _LINK_SAMPLE):
+            url = str(r[j])
+            # longest value first, so a short symbol cannot split the exchange name
+            for name, v in sorted(zip(_LINK_FIELDS, vals), key=lambda f: -len(f[1])):
+                if v:
+                    url = url.replace(v, '{' + name + '}')
+            votes[url] += 1
+        t = votes.most_common(1)[0][0] if votes else ''
+        out[col] = {"t": t, "x": {r[si]: r[j] for r, vals in zip(rows, keys) if _render_link(t, vals) != str(r[j])}}
+    return out
+
+def _row_layout(cols):
+    return [c for c in cols if c not in _LINK_COLS], [c for c in cols if c in _LINK_COLS]
+
+def _projection(snap, rows, cols):
+    plain, lcols = _row_layout(cols)
+    tpl = snapshot_artifact(snap, "links", _link_templates) if lcols else None
+    if tpl is None:
+        # without templates link columns ship as plain columns
+        plain, lcols = list(cols), []
+    idx = [COLUMNS.index(c) for c in plain]
+    get = operator.itemgetter(*idx)
+    out = [list(get(r)) for r in rows] if len(idx) > 1 else [[r[idx[0]]] for r in rows]
+    links = {}
+    if lcols:
+        si = COLUMNS.index('symbol')
+        whole = rows is snap["payload"]["rows"]
+        for c in lcols:
+            x = tpl[c]["x"]
+            links[c] = {"t": tpl[c]["t"], "x": x if whole else {r[si]: x[r[si]] for r in rows if r[si] in x}}
+    return {"rows": out, "columns": plain, "col_index": {c: i for i, c in enumerate(plain)},
+            "link_columns": lcols, "links": links}
+
+def _project_delta(delta, cols):
+    if delta.get("full"):
+        return delta
+    # added rows use the client's layout after link expansion: plain columns, then link columns
+    plain, lcols = _row_layout(cols)
+    idx, keep = [COLUMNS.index(c) for c in plain + lcols], set(cols)
+    changed = [[sym, {c: v for c, v in cells.items() if c in keep}] for sym, cells in delta["changed"]]
+    return dict(delta, added=[[r[i] for i in idx] for r in delta["added"]],
+                changed=[ch for ch in changed if ch[1]])
+
+def _snapshot_lru(snap, name, key, build):
+    cache = snapshot_artifact(snap, name, lambda s: collections.OrderedDict())
+    with snap["lock"]:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            return value
+    value = build()
+    with snap["lock"]:
+        cache[key] = value
+        while len(cache) > max(1, QUERY_CACHE_SIZE):
+            cache.popitem(last=False)
+    return value
+
+def projection_response(snap, variant, build, mimetype='application/json'):
+    bodies = _snapshot_lru(snap, "projections", variant, lambda: _timed_call("serialize", build))
+    return _bodies_response(snap, variant, bodies, mimetype)
+
+def _projected_bodies(snap, fmt, cols):
+    payload = dict(snap["payload"], **_projection(snap, snap["payload"]["rows"], cols))
+    if fmt in _FEED_FORMATS:
+        return _feed_bodies(fmt, payload, payload["columns"])
+    return _columnar_body(payload, payload["columns"]) if fmt == 'columnar' else _json_body(payload)
+
+# Background watcher: wakes on inotify events for the CSV directories (or every
+# WATCH_INTERVAL seconds without inotify), waits until the newest CSV stops
+# changing size/mtime, then parses it and swaps the snapshot in. A file that
+# fails to parse is remembered by its key and skipped until it changes again.
+_WATCHER = {"thread": None, "mode": None, "dirs": (), "last_error": None, "last_swap": None, "failed": None}
+_WATCH_MASK = 0
+if inotify_simple is not None:
+    _WATCH_MASK = (inotify_simple.flags.CLOSE_WRITE | inotify_simple.flags.MOVED_TO | inotify_simple.flags.CREATE
+                   | inotify_simple.flags.DELETE | inotify_simple.flags.MOVED_FROM)
+
+def watcher_running():
+    t = _WATCHER["thread"]
+    return t is not None and t.is_alive()
+
+def _folder_watched(path):
+    return _WATCHER["mode"] == "inotify" and path in _WATCHER["dirs"] and watcher_running()
+
+def _watch_dirs():
+    dirs = {APP_DIR}
+    if CSV_FOLDER and os.path.isdir(CSV_FOLDER):
+        dirs.add(os.path.abspath(CSV_FOLDER))
+    if CSV_PATH and os.path.isdir(os.path.dirname(os.path.normpath(CSV_PATH)) or '.'):
+        dirs.add(os.path.abspath(os.path.dirname(os.path.normpath(CSV_PATH)) or '.'))
+    return dirs
+
+def _wait_stable(path, settle, timeout=60.0):
+    prev, deadline = None, time.monotonic() + timeout
+    while True:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        cur = (st.st_size, st.st_mtime_ns, st.st_ino)
+        if cur == prev or time.monotonic() > deadline:
+            return True
+        prev = cur
+        time.sleep(settle)
+
+def _watch_once():
+    path = get_csv_source()
+    if not path:
+        return
+    try:
+        key = _file_key(path, _stat_source(path))
+    except OSError:
+        return
+    if key == _SNAPSHOT["key"] or key == _WATCHER["failed"] or not all(_wait_stable(p, WATCH_SETTLE) for p in (path if isinstance(path, tuple) else (path,))):
+        return
+    snap = _resolve_snapshot()
+    if snap["id"] is not None:
+        _WATCHER["failed"] = None
+        _WATCHER["last_swap"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    else:
+        _WATCHER["failed"] = key
+        _WATCHER["last_error"] = snap["payload"]["error"]
+
+def _watch_loop():
+    ino, dirs = None, _watch_dirs()
+    if inotify_simple is not None:
+        try:
+            ino = inotify_simple.INotify()
+            for d in dirs:
+                ino.add_watch(d, _WATCH_MASK)
+        except OSError:
+            ino = None
+    _WATCHER["mode"] = "inotify" if ino else "poll"
+    _WATCHER["dirs"] = frozenset(dirs) if ino else ()
+    while True:
+        try:
+            _watch_once()
+            if _WATCHER["failed"] is None:
+                _WATCHER["last_error"] = None
+        except Exception as e:
+            _WATCHER["last_error"] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        if ino:
+            # the timeout doubles as a safety poll (e.g. in-place rewrites of a watched path)
+            if ino.read(timeout=int(WATCH_INTERVAL * 5000)):
+                invalidate_folder_index()
+        else:
+            time.sleep(WATCH_INTERVAL)
+
+def start_watcher():
+    with _SNAPSHOT_LOCK:
+        if watcher_running():
+            return _WATCHER["thread"]
+        t = threading.Thread(target=_watch_loop, name="maxxscan-watcher", daemon=True)
+        _WATCHER["thread"] = t
+        t.start()
+    return t
+
+def watcher_status():
+    return {"running": watcher_running(), "mode": _WATCHER["mode"], "last_swap": _WATCHER["last_swap"], "last_error": _WATCHER["last_error"]}
+
+# Row-level deltas against a retained recent snapshot, keyed by symbol. Cells
+# are compared by value and type so 0 vs 0.0 still counts as a change.
+def _rows_by_symbol(snap):
+    # None when symbols repeat or are blank: rows cannot be matched by symbol then
+    si = COLUMNS.index('symbol')
+    rows = snap["payload"]["rows"]
+    by_sym = {r[si]: r for r in rows}
+    return by_sym if len(by_sym) == len(rows) and '' not in by_sym else None
+
+def _recent_snapshot(sid):
+    for snap in list(_RECENT):
+        if snap["id"] == sid:
+            return snap
+    return None
+
+def _build_delta(old, new):
+    a = snapshot_artifact(old, "by_symbol", _rows_by_symbol)
+    b = snapshot_artifact(new, "by_symbol", _rows_by_symbol)
+    if a is None or b is None:
+        return {"full": True, "since": old["id"], "snapshot_id": new["id"], "error": None}
+    changed = []
+    for sym, row in b.items():
+        prev = a.get(sym)
+        if prev is None or prev == row and all(type(u) is type(v) for u, v in zip(prev, row)):
+            continue
+        cells = {c: v for c, u, v in zip(COLUMNS, prev, row) if u != v or type(u) is not type(v)}
+        if cells:
+            changed.append([sym, cells])
+    p = new["payload"]
+    delta = {
+        "since": old["id"],
+        "snapshot_id": new["id"],
+        "file": p["file"],
+        "modified": p["modified"],
+        "total": p["total"],
+        "added": [row for sym, row in b.items() if sym not in a],
+        "removed": [sym for sym in a if sym not in b],
+        "changed": changed,
+    }
+    if [s for s in a if s in b] != [s for s in b if s in a] or delta["added"]:
+        delta["order"] = list(b)
+    return delta
+
+# Server-side filter/sort/page for /api/data, mirroring the terminal's
+# filterEngine() query: pinned rows first, stable sort, numbers before text.
+_QUERY_PARAMS = ('arch', 'preset', 'q', 'qf', 'pins', 'sort', 'dir', 'offset', 'limit')
+_QUICK_FILTERS = {'gap', 'hod', 'explosive', 'pm', 'earnings', 'pinned'}
+_EFF_FALLBACK = {'px_eff': 'price', 'chg_eff': 'change_pct', 'vol_eff': 'volume'}
+
+def _true_like(v):
+    return v is True or str(v).lower() in ('true', '1')
+
+def _num(v):
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return 0
+    return v if math.isfinite(v) else 0
+
+def _sort_value(v):
+    if isinstance(v, (int, float)) and math.isfinite(v):
+        return (0, v, '')
+    if isinstance(v, str) and v:
+        try:
+            n = float(v)
+            if math.isfinite(n):
+                return (0, n, '')
+        except ValueError:
+            pass
+    s = str(v)
+    return (1, 0, s.casefold(), s)
+
+# Secondary indexes, built once per snapshot before it is published. Row sets
+# are Python ints used as bitsets (bit i = row i), so quick-filter combinations
+# are a few big-int ANDs; sort orders are cached row-id permutations.
+_PRESORTED = ('master_rank', 'composite_score', 'ml_final_score', 'chg_eff', 'vol_eff')
+
+_BIT_CHARS = bytes.maketrans(b'\x00\x01', b'01')
+
+def _bitset(flags):
+    return int(bytes(flags)[::-1].translate(_BIT_CHARS) or b'0', 2)
+
+def _bit_ids(mask):
+    return [i for i, b in enumerate(bin(mask)[:1:-1]) if b == '1']
+
+def _inverted(rows, i, split=None):
+    groups = {}
+    for r, v in enumerate(map(operator.itemgetter(i), rows)):
+        groups.setdefault(v, []).append(r)
+    ids = {}
+    for v, rs in groups.items():
+        v = str(v)
+        for t in v.split(split) if split else (v,):
+            if t:
+                m = ids.setdefault(t, bytearray(len(rows)))
+                for r in rs:
+                    m[r] = 1
+    return {t: _bitset(m) for t, m in ids.items()}
+
+def _sort_key(col):
+    i = COLUMNS.index(col)
+    if col in _EFF_FALLBACK:
+        j = COLUMNS.index(_EFF_FALLBACK[col])
+        return lambda r: _num(r[i] or r[j] or 0)
+    return lambda r: _sort_value(r[i])
+
+def _build_index(snap):
+    with timed_phase("index"):
+        return _index_rows(snap["payload"]["rows"])
+
+def _index_rows(rows):
+    ix = COLUMNS.index
+    si = ix('symbol')
+    symbols = {}
+    for r, row in enumerate(rows):
+        symbols.setdefault(str(row[si]).upper(), r)
+    archetype = _inverted(rows, ix('ml_archetype'))
+    flags = {c: _bitset([v if v.__class__ is bool else _true_like(v) for v in map(operator.itemgetter(ix(c)), rows)])
+             for c in BOOLISH_COLS}
+    gi = ix('gap_pct')
+    idx = {
+        "all": (1 << len(rows)) - 1,
+        "symbol": symbols,
+        "archetype": archetype,
+        "preset": _inverted(rows, ix('presets_list'), '|'),
+        "flags": flags,
+        "quick": {
+            "gap": _bitset([_num(row[gi]) > 5 for row in rows]),
+            "hod": flags['flag_hod'],
+            "explosive": archetype.get('EXPLOSIVE', 0),
+            "pm": flags['flag_pm_active'],
+            "earnings": flags['flag_has_earnings'],
+        },
+        "order": {},
+    }
+    for col in _PRESORTED:
+        keys = list(map(_sort_key(col), rows))
+        for direction in ('asc', 'desc'):
+            idx["order"][col, direction] = _sort_permutation(keys, direction)
+    return idx
+
+def _sort_permutation(keys, direction):
+    return array.array('i', sorted(range(len(keys)), key=keys.__getitem__, reverse=direction == 'desc'))
+
+def sort_permutation(snap, col, direction):
+    order = snapshot_artifact(snap, "index", _build_index)["order"]
+    if (col, direction) not in order:
+        with snap["lock"]:
+            if (col, direction) not in order:
+                order[col, direction] = _sort_permutation(list(map(_sort_key(col), snap["payload"]["rows"])), direction)
+    return order[col, direction]
+
+def lookup_symbol(snap, sym):
+    r = snapshot_artifact(snap, "index", _build_index)["symbol"].get(sym.strip().upper())
+    return None if r is None else snap["payload"]["rows"][r]
+
+def _facets(snap):
+    ai = COLUMNS.index('ml_archetype')
+    return {"archetypes": sorted({str(r[ai]) for r in snap["payload"]["rows"] if r[ai]})}
+
+def _parse_query(args):
+    qf = {f for f in args.get('qf', '').split(',') if f}
+    if qf - _QUICK_FILTERS:
+        raise ValueError(f"Unknown quick filter: {','.join(sorted(qf - _QUICK_FILTERS))}")
+    sort = args.get('sort') or None
+    if sort is not None and sort not in COLUMNS:
+        raise ValueError(f"Unknown sort column: {sort}")
+    direction = args.get('dir') or ('asc' if sort == 'master_rank' else 'desc')
+    if direction not in ('asc', 'desc'):
+        raise ValueError(f"Unknown sort direction: {direction}")
+    offset, limit = args.get('offset', '0'), args.get('limit', '')
+    if not offset.isdigit() or limit and not limit.isdigit():
+        raise ValueError("offset/limit must be non-negative integers")
+    pins = frozenset(p.strip().upper() for p in args.get('pins', '').split(',') if p.strip())
+    key = (args.get('arch', ''), args.get('preset', ''), args.get('q', '').upper(),
+           tuple(sorted(qf)), tuple(sorted(pins)), sort, direction)
+    return key, int(offset), int(limit) if limit else None
+
+def _query_rows(snap, key):
+    arch, preset, q, qf, pins, sort, direction = key
+    idx = snapshot_artifact(snap, "index", _build_index)
+    rows = snap["payload"]["rows"]
+    mask = idx["all"]
+    if arch:
+        mask &= idx["archetype"].get(arch, 0)
+    if preset:
+        # presets_list filtering is a substring match, so OR every token containing it
+        hits = 0
+        if '|' in preset:
+            hits = _bitset([preset in str(row[COLUMNS.index('presets_list')]) for row in rows])
+        else:
+            for t, bits in idx["preset"].items():
+                if preset in t:
+                    hits |= bits
+        mask &= hits
+    for f in qf:
+        if f in idx["quick"]:
+            mask &= idx["quick"][f]
+    if sort is None:
+        ids = _bit_ids(mask)
+    else:
+        bits = bin(mask)[:1:-1]
+        n = len(bits)
+        ids = [r for r in sort_permutation(snap, sort, direction) if r < n and bits[r] == '1']
+    out = [rows[r] for r in ids]
+    si = COLUMNS.index('symbol')
+    if q:
+        ni = COLUMNS.index('name')
+        out = [r for r in out if q in str(r[si]).upper() or q in str(r[ni]).upper()]
+    if 'pinned' in qf:
+        out = [r for r in out if str(r[si]).upper() in pins]
+    if pins:
+        pins = set(pins)
+        out = [r for r in out if str(r[si]).upper() in pins] + [r for r in out if str(r[si]).upper() not in pins]
+    return out
+
+def query_snapshot(snap, key):
+    return _snapshot_lru(snap, "queries", key, lambda: _query_rows(snap, key))
+
+def _query_response(snap, key, offset, limit, cols=None):
+    etag = snap["id"] + "-q" + hashlib.sha1(repr((key, offset, limit, cols)).encode('utf-8')).hexdigest()[:12]
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        rows = query_snapshot(snap, key)
+        page = rows[offset:] if limit is None else rows[offset:offset + limit]
+        payload = dict(snap["payload"], rows=page, matched=len(rows), offset=offset,
+                       limit=limit, facets=snapshot_artifact(snap, "facets", _facets))
+        if cols is not None:
+            payload.update(_projection(snap, page, cols))
+        with timed_phase("serialize"):
+            resp = jsonify(payload)
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+# History archive: each published snapshot is written once, off the request
+# path, to <HISTORY_DIR>/<snapshot_id>.mxc -- b'MXC1', u32 header length, a JSON
+# header, then 8-byte aligned little-endian column buffers (i64/f64, packed
+# flag bits, dictionary indices). manifest.json lists archives oldest first.
+# Archives are read back through mmap; nothing is re-parsed.
+_MXC_MAGIC = b'MXC1'
+_MXC_STRUCT = {'i64': '<q', 'f64': '<d', 'B': '<B', 'H': '<H', 'I': '<I'}
+_HISTORY_OPEN_MAX = 64
+HISTORY_FIELDS = ('px_eff', 'price', 'chg_eff', 'rel_volume', 'composite_score', 'ml_final_score', 'master_rank')
+_HISTORY = {"thread": None, "queue": queue.Queue(), "lock": threading.Lock(), "manifest": None,
+            "open": collections.OrderedDict(), "written": 0, "last_error": None}
+
+def _write_archive(path, snap, extra=None, blobs=None):
+    rows = snap["payload"]["rows"]
+    bufs = []
+    def put(b):
+        offset = sum(map(len, bufs))
+        bufs.append(b + b'\0' * (-len(b) % 8))
+        return [offset, len(b)]
+    cols = []
+    for j, (col, kind, v) in enumerate(columnar_columns(rows, dict_all=True)):
+        meta = {"name": col, "kind": kind}
+        if kind == 'dict':
+            meta["dict"], meta["idx"], v = v[0], v[1].typecode, v[1]
+        meta["offset"], meta["length"] = put(v if kind == 'bits' else _le_bytes(v))
+        if kind == 'f64':
+            # remember which cells were ints (0 for blanks, long ints) so reads give back the same types
+            ints = [r[j].__class__ is int for r in rows]
+            if any(ints):
+                meta["ints"] = put(_pack_bits(ints))
+        cols.append(meta)
+    p = snap["payload"]
+    head = {"snapshot_id": snap["id"], "rows": len(rows), "file": p["file"], "modified": p["modified"], "columns": cols}
+    if blobs:
+        head["blobs"] = {name: put(b) for name, b in blobs.items()}
+    head.update(extra or {})
+    header = app.json.dumps(head, separators=(",", ":")).encode('utf-8')
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_MXC_MAGIC + len(header).to_bytes(4, 'little') + header + b'\0' * (-(8 + len(header)) % 8))
+        for b in bufs:
+            f.write(b)
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+def _open_archive(path):
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:4] != _MXC_MAGIC:
+        mm.close()
+        raise ValueError(f"Not a snapshot archive: {path}")
+    n = int.from_bytes(mm[4:8], 'little')
+    header = app.json.loads(mm[8:8 + n].decode('utf-8'))
+    return {"mm": mm, "header": header, "start": 8 + n + (-(8 + n) % 8),
+            "cols": {c["name"]: c for c in header["columns"]}, "symbols": None}
+
+def _archive(name):
+    arcs = _HISTORY["open"]
+    arc = arcs.get(name)
+    if arc is None:
+        arc = arcs[name] = _open_archive(os.path.join(HISTORY_DIR, name))
+        while len(arcs) > _HISTORY_OPEN_MAX:
+            arcs.popitem(last=False)[1]["mm"].close()
+    arcs.move_to_end(name)
+    return arc
+
+def _archive_value(arc, col, r):
+    c = arc["cols"][col]
+    base = arc["start"] + c["offset"]
+    kind = c["kind"]
+    if kind == 'bits':
+        return bool(arc["mm"][base + (r >> 3)] >> (r & 7) & 1)
+    if kind == 'dict':
+        fmt = _MXC_STRUCT[c["idx"]]
+        return c["dict"][struct.unpack_from(fmt, arc["mm"], base + r * struct.calcsize(fmt))[0]]
+    v = struct.unpack_from(_MXC_STRUCT[kind], arc["mm"], base + r * 8)[0]
+    if "ints" in c and arc["mm"][arc["start"] + c["ints"][0] + (r >> 3)] >> (r & 7) & 1:
+        return int(v)
+    return v
+
+def archive_rows(arc):
+    mm, start, n = arc["mm"], arc["start"], arc["header"]["rows"]
+    def bits(offset, length):
+        b = int.from_bytes(mm[start + offset:start + offset + length], 'little')
+        return [ch == '1' for ch in bin(b)[:1:-1].ljust(n, '0')[:n]]
+    cols = []
+    for c in arc["header"]["columns"]:
+        kind = c["kind"]
+        if kind == 'bits':
+            cols.append(bits(c["offset"], c["length"]))
+            continue
+        a = start + c["offset"]
+        arr = array.array(c["idx"] if kind == 'dict' else _MXC_STRUCT[kind][1], mm[a:a + c["length"]])
+        if sys.byteorder != 'little':
+            arr.byteswap()
+        if kind == 'dict':
+            cols.append(list(map(c["dict"].__getitem__, arr)))
+            continue
+        vals = arr.tolist()
+        if "ints" in c:
+            for r, is_int in enumerate(bits(*c["ints"])):
+                if is_int:
+                    vals[r] = int(vals[r])
+        cols.append(vals)
+    return list(map(list, zip(*cols)))
+
+def _archive_symbols(arc):
+    if arc["symbols"] is None:
+        c = arc["cols"]["symbol"]
+        names = c["dict"]
+        if len(names) == arc["header"]["rows"]:
+            # dictionary codes follow first occurrence, so unique symbols map code == row
+            codes = range(len(names))
+        else:
+            a = arc["start"] + c["offset"]
+            codes = array.array(c["idx"], arc["mm"][a:a + c["length"]])
+            if sys.byteorder != 'little':
+                codes.byteswap()
+        symbols = {}
+        for r, code in enumerate(codes):
+            symbols.setdefault(str(names[code]).upper(), r)
+        arc["symbols"] = symbols
+    return arc["symbols"]
+
+def _manifest():
+    if _HISTORY["manifest"] is None:
+        try:
+            with open(os.path.join(HISTORY_DIR, 'manifest.json'), encoding='utf-8') as f:
+                _HISTORY["manifest"] = app.json.loads(f.read())
+        except (OSError, ValueError):
+            _HISTORY["manifest"] = []
+    return _HISTORY["manifest"]
+
+def _save_manifest(entries):
+    path = os.path.join(HISTORY_DIR, 'manifest.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(app.json.dumps(entries))
+    os.replace(path + '.tmp', path)
+
+def _evict_history(entries):
+    while len(entries) > 1 and (len(entries) > HISTORY_MAX_SNAPSHOTS or sum(e["bytes"] for e in entries) > HISTORY_MAX_BYTES):
+        e = entries.pop(0)
+        arc = _HISTORY["open"].pop(e["file"], None)
+        if arc is not None:
+            arc["mm"].close()
+        try:
+            os.remove(os.path.join(HISTORY_DIR, e["file"]))
+        except FileNotFoundError:
+            pass
+
+def _archive_snapshot(snap):
+    with _HISTORY["lock"]:
+        if any(e["id"] == snap["id"] for e in _manifest()):
+            return
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    name = snap["id"] + '.mxc'
+    size = _write_archive(os.path.join(HISTORY_DIR, name), snap)
+    p = snap["payload"]
     try:
-        mod_time = datetime.fromtimestamp(os.path.getmtime(path))
-        file_size = os.path.getsize(path)
+        mtime = os.path.getmtime(p["full_path"])
+    except (OSError, TypeError):
+        mtime = time.time()
+    entry = {"id": snap["id"], "file": name, "source": p["file"], "modified": p["modified"],
+             "mtime": mtime, "rows": p["total"], "bytes": size}
+    with _HISTORY["lock"]:
+        entries = _manifest()
+        entries.append(entry)
+        entries.sort(key=lambda e: e["mtime"])
+        _evict_history(entries)
+        _save_manifest(entries)
+        _HISTORY["written"] += 1
+
+def _backfill_history():
+    if not (CSV_FOLDER and os.path.isdir(CSV_FOLDER)):
+        return
+    files = folder_csvs(CSV_FOLDER)
+    if SHARD_PATTERN:
+        files = [run for _, run in shard_runs(files)]
+    for path in files[-HISTORY_MAX_SNAPSHOTS:]:
+        st = _stat_source(path)
+        key = _file_key(path, st)
+        with _HISTORY["lock"]:
+            if any(e["id"] == _snapshot_id(key) for e in _manifest()):
+                continue
+        payload = _parse_csv(path, st)
+        if payload["error"] is None:
+            _archive_snapshot(_new_snapshot(key, payload))
+
+def _history_loop():
+    q = _HISTORY["queue"]
+    while True:
+        job = q.get()
+        try:
+            job()
+        except Exception as e:
+            _HISTORY["last_error"] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
 
-        content, used_encoding = None, None
-        for enc in ('utf-8-sig','utf-8','cp1252','latin-1'):
+def _history_submit(job):
+    with _HISTORY["lock"]:
+        t = _HISTORY["thread"]
+        if t is None or not t.is_alive():
+            t = _HISTORY["thread"] = threading.Thread(target=_history_loop, name="maxxscan-history", daemon=True)
+            t.start()
+    _HISTORY["queue"].put(job)
+
+def archive_snapshot(snap):
+    if HISTORY_DIR and snap["id"] is not None:
+        _history_submit(lambda: _archive_snapshot(snap))
+
+def backfill_history():
+    if HISTORY_DIR:
+        _history_submit(_backfill_history)
+
+def _entry_day(e):
+    return datetime.fromtimestamp(e["mtime"]).strftime('%Y-%m-%d')
+
+def symbol_history(sym, fields=HISTORY_FIELDS, day=None):
+    sym = sym.strip().upper()
+    out = {"symbol": sym, "day": day, "fields": list(fields), "snapshots": [], "modified": [],
+           "series": {f: [] for f in fields}, "error": None}
+    with _HISTORY["lock"]:
+        entries = list(_manifest())
+        if entries and day is None:
+            out["day"] = day = _entry_day(entries[-1])
+        for e in entries:
+            if day != 'all' and _entry_day(e) != day:
+                continue
             try:
-                with open(path, 'r', encoding=enc, errors='replace') as f:
-                    content = f.read()
-                used_encoding = enc
-                break
-            except Exception:
+                arc = _archive(e["file"])
+            except (OSError, ValueError):
+                continue
+            r = _archive_symbols(arc).get(sym)
+            if r is None:
                 continue
+            out["snapshots"].append(e["id"])
+            out["modified"].append(e["modified"])
+            for f in fields:
+                out["series"][f].append(_archive_value(arc, f, r) if f in arc["cols"] else None)
+    return out
 
-        if content is None:
-            p = _empty_api_payload("Could not read CSV")
-            p["file"] = os.path.basename(path)
-            p["modified"] = mod_time.strftime("%Y-%m-%d %H:%M:%S")
-            return p
+def history_status():
+    if not HISTORY_DIR:
+        return {"enabled": False}
+    with _HISTORY["lock"]:
+        entries = list(_manifest())
+    return {"enabled": True, "dir": HISTORY_DIR, "snapshots": len(entries), "bytes": sum(e["bytes"] for e in entries),
+            "max_snapshots": HISTORY_MAX_SNAPSHOTS, "max_bytes": HISTORY_MAX_BYTES,
+            "pending": _HISTORY["queue"].qsize(), "written": _HISTORY["written"], "last_error": _HISTORY["last_error"]}
 
-        if content.startswith('\ufeff'):
-            content = content[1:]
+# Shared snapshot for multi-process servers (MAXXSCAN_SHARED_DIR, ideally on
+# /dev/shm). Whoever holds the flock on loader.lock parses the CSV and publishes
+# gen-<n>.mxc: the columnar archive above plus the pre-encoded /api/data bodies.
+# The 8-byte `current` file holds the live generation; every process maps it
+# read-only and attaches when it moves. /api/data is served straight from the
+# mapping; rows are decoded from it only when a worker needs them (queries,
+# deltas, lookups). With MAXXSCAN_SHARED_PUBLISHER set, only the loader (see
+# gunicorn_shared.conf.py) stats the CSV and workers just follow the generation.
+_SHARED_KEEP = 3
+_SHARED = {"ctl": None, "loader": False, "parses": 0, "attaches": 0}
 
-        reader = csv.DictReader(content.splitlines())
-        if reader.fieldnames:
-            reader.fieldnames = [str(f).strip().strip('\r').strip('\ufeff') for f in reader.fieldnames]
+class _SharedBodies(dict):
+    # {encoding: (offset, length)}; values are copied out of the mapping per response
+    def __init__(self, mm, spans):
+        super().__init__(spans)
+        self.mm = mm
 
-        rows = []
-        for raw in reader:
-            row = []
-            for col in COLUMNS:
-                v = raw.get(col, '')
-                if col in NUMERIC_COLS:
-                    v = _coerce_numeric(col, v)
-                elif col in BOOLISH_COLS:
-                    v = _coerce_boolish(v)
-                else:
-                    v = '' if v is None else str(v).strip().strip('\r')
-                row.append(v)
-            rows.append(row)
-
-        return {
-            "rows": rows,
-            "columns": COLUMNS,
-            "col_index": {c:i for i,c in enumerate(COLUMNS)},
-            "schema": {"numeric_cols": sorted(NUMERIC_COLS), "boolish_cols": sorted(BOOLISH_COLS)},
-            "total": len(rows),
-            "file": os.path.basename(path),
-            "full_path": path,
-            "modified": mod_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "size_kb": round(file_size/1024, 1),
-            "encoding": used_encoding,
-            "error": None
-        }
+    def __getitem__(self, enc):
+        a, n = dict.__getitem__(self, enc)
+        return self.mm[a:a + n]
+
+class _SharedPayload(dict):
+    # payload metadata; "rows" is decoded from the archive on first access
+    def __init__(self, meta, arc):
+        super().__init__(meta)
+        self.arc = arc
+        self.lock = threading.Lock()
+
+    def __missing__(self, key):
+        if key != 'rows':
+            raise KeyError(key)
+        with self.lock:
+            if 'rows' not in self:
+                self['rows'] = archive_rows(self.arc)
+            return dict.__getitem__(self, 'rows')
 
+def _shared_path(name):
+    return os.path.join(SHARED_DIR, name)
+
+def _shared_gen():
+    ctl = _SHARED["ctl"]
+    if ctl is None:
+        os.makedirs(SHARED_DIR, exist_ok=True)
+        fd = os.open(_shared_path('current'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < 8:
+                os.ftruncate(fd, 8)
+            ctl = _SHARED["ctl"] = mmap.mmap(fd, 8, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+    return struct.unpack_from('<Q', ctl)[0]
+
+def _as_tuple(v):
+    return tuple(map(_as_tuple, v)) if isinstance(v, list) else v
+
+def _shared_attach(gen):
+    arc = _open_archive(_shared_path(f'gen-{gen}.mxc'))
+    h, start = arc["header"], arc["start"]
+    bodies = {}
+    for name, (a, n) in h["blobs"].items():
+        variant, enc = name.split('/')
+        bodies.setdefault(variant, {})[enc] = (start + a, n)
+    _SHARED["attaches"] += 1
+    return {"key": _as_tuple(h["key"]), "id": h["snapshot_id"], "gen": gen,
+            "payload": _SharedPayload(h["payload"], arc),
+            "artifacts": {"bodies:" + v: _SharedBodies(arc["mm"], spans) for v, spans in bodies.items()},
+            "lock": threading.RLock()}
+
+def _shared_key(gen):
+    if _SNAPSHOT.get("gen") == gen:
+        return _SNAPSHOT["key"]
+    arc = _open_archive(_shared_path(f'gen-{gen}.mxc'))
+    try:
+        return _as_tuple(arc["header"]["key"])
+    finally:
+        arc["mm"].close()
+
+def _shared_publish(path, st, key):
+    # returns (generation, error payload); the flock makes it single-flight across processes
+    with open(_shared_path('loader.lock'), 'ab') as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            gen = _shared_gen()
+            if gen and _shared_key(gen) == key:
+                return gen, None
+            payload = _timed_parse(path, st)
+            _SHARED["parses"] += 1
+            if payload["error"] is not None:
+                return gen, payload
+            snap = _new_snapshot(key, payload)
+            blobs = {f"{variant}/{enc}": body for variant, build in _DATA_FORMATS.items()
+                     for enc, body in build(snap).items()}
+            meta = {k: v for k, v in payload.items() if k != 'rows'}
+            gen += 1
+            _write_archive(_shared_path(f'gen-{gen}.mxc'), snap, {"gen": gen, "key": key, "payload": meta}, blobs)
+            fd = os.open(_shared_path('current'), os.O_RDWR)
+            try:
+                os.pwrite(fd, struct.pack('<Q', gen), 0)
+            finally:
+                os.close(fd)
+            for name in os.listdir(SHARED_DIR):
+                m = re.fullmatch(r'gen-(\d+)\.mxc', name)
+                if m and int(m.group(1)) <= gen - _SHARED_KEEP:
+                    os.remove(_shared_path(name))
+            if HISTORY_DIR:
+                archive_snapshot(snap)
+            return gen, None
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+def _resolve_shared():
+    global _SNAPSHOT
+    gen = _shared_gen()
+    snap = _SNAPSHOT
+    key = None
+    if _SHARED["loader"] or not SHARED_PUBLISHER:
+        path, st, err = _stat_csv()
+        if err is not None:
+            return err
+        key = _file_key(path, st)
+        if snap["key"] == key and snap.get("gen") == gen:
+            _count("hits")
+            return snap
+    elif gen and snap.get("gen") == gen:
+        _count("hits")
+        return snap
+    with _SNAPSHOT_LOCK:
+        gen = _shared_gen()
+        if key is not None and (not gen or _shared_key(gen) != key):
+            _count("misses")
+            gen, err = _shared_publish(path, st, key)
+            if err is not None:
+                return _new_snapshot(None, err)
+        if not gen:
+            return _new_snapshot(None, _empty_api_payload(f"No shared snapshot published yet in {SHARED_DIR}"))
+        if _SNAPSHOT.get("gen") != gen:
+            _SNAPSHOT = _shared_attach(gen)
+            _RECENT.append(_SNAPSHOT)
+            with _SNAPSHOT_CHANGED:
+                _SNAPSHOT_CHANGED.notify_all()
+        else:
+            _count("hits")
+        return _SNAPSHOT
+
+def start_shared_loader():
+    # run in the process that should do all parsing (the gunicorn master)
+    _SHARED["loader"] = True
+    get_snapshot()
+    return start_watcher()
+
+def shared_status():
+    if not SHARED_DIR:
+        return {"enabled": False}
+    return {"enabled": True, "dir": SHARED_DIR, "publisher": SHARED_PUBLISHER, "loader": _SHARED["loader"],
+            "published": _shared_gen(), "attached": _SNAPSHOT.get("gen"),
+            "parses": _SHARED["parses"], "attaches": _SHARED["attaches"]}
+
+# Locks, background threads and counters do not carry over fork(); children start clean.
+def _reset_after_fork():
+    global _SNAPSHOT_LOCK, _STATS_LOCK, _SNAPSHOT_CHANGED
+    _SNAPSHOT_LOCK, _STATS_LOCK, _SNAPSHOT_CHANGED = threading.Lock(), threading.Lock(), threading.Condition()
+    for snap in [_SNAPSHOT, *_RECENT]:
+        snap["lock"] = threading.RLock()
+    _WATCHER.update(thread=None, mode=None, dirs=(), failed=None)
+    _FOLDER_INDEX["lock"] = threading.Lock()
+    _HISTORY.update(thread=None, queue=queue.Queue(), lock=threading.Lock())
+    _SHARED.update(loader=False, parses=0, attaches=0)
+    SNAPSHOT_STATS.update(hits=0, misses=0, rebuilds=0, last_rebuild_ms=None, total_rebuild_ms=0.0)
+    _SHARD_POOL.update(pool=None, lock=threading.Lock(), parses=0, fallbacks=0)
+    _METRICS.update(lock=threading.Lock(), hist={}, counters=collections.Counter())
+    _PROFILE.update(lock=threading.Lock(), seq=itertools.count(1), written=0, skipped=0)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+# Server-Sent Events: one "snapshot" event per swapped-in snapshot, comment
+# heartbeats in between. Streams end after SSE_MAX_AGE so worker timeouts and
+# proxies never see an endless response; EventSource reconnects with
+# Last-Event-ID and only hears about snapshots it has not seen.
+def _sse_event(snap):
+    p = snap["payload"]
+    data = {"snapshot_id": snap["id"], "file": p.get("file"), "modified": p.get("modified"), "total": p.get("total")}
+    return f"id: {snap['id']}\nevent: snapshot\ndata: {app.json.dumps(data, separators=(',', ':'))}\n\n"
+
+def _sse_stream(seen):
+    yield "retry: 3000\n\n"
+    now = time.monotonic()
+    deadline, beat = now + SSE_MAX_AGE, now + SSE_HEARTBEAT
+    while time.monotonic() < deadline:
+        # other processes publish shared snapshots, so follow the generation here
+        snap = get_snapshot() if SHARED_DIR else _SNAPSHOT
+        if snap["id"] is not None and snap["id"] != seen:
+            seen = snap["id"]
+            beat = time.monotonic() + SSE_HEARTBEAT
+            yield _sse_event(snap)
+            continue
+        wait = min(beat, deadline) - time.monotonic()
+        with _SNAPSHOT_CHANGED:
+            if _SNAPSHOT["id"] == seen:
+                _SNAPSHOT_CHANGED.wait(max(0.0, min(wait, WATCH_INTERVAL) if SHARED_DIR else wait))
+        if _SNAPSHOT["id"] == seen and time.monotonic() >= beat:
+            beat = time.monotonic() + SSE_HEARTBEAT
+            yield ": heartbeat\n\n"
+
+# Route latency is handler time; "write" is the time from the handler returning
+# until the server has sent the body. Streamed (SSE) responses only count once.
+@app.before_request
+def _metrics_start():
+    request.environ['maxxscan.t0'] = time.perf_counter()
+
+@app.after_request
+def _metrics_finish(resp):
+    t0 = request.environ.get('maxxscan.t0')
+    if t0 is None:
+        return resp
+    t1 = time.perf_counter()
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    _observe("maxxscan_http_request_duration_seconds",
+             (("route", route), ("method", request.method), ("status", str(resp.status_code))), t1 - t0)
+    if not resp.is_streamed:
+        _inc("bytes_served", resp.calculate_content_length() or 0)
+        resp.call_on_close(lambda: observe_phase("write", time.perf_counter() - t1))
+    return resp
+
+# Opt-in profiling: with PROFILE_DIR set, every PROFILE_EVERY-th request and
+# any request whose X-Maxxscan-Profile header matches PROFILE_SECRET is
+# profiled -- pyinstrument to speedscope JSON when installed, else cProfile to
+# .prof. One request is profiled at a time per process; the directory is
+# trimmed oldest-first to PROFILE_MAX_BYTES.
+_PROFILE_SUFFIXES = ('.prof', '.speedscope.json')
+_PROFILE = {"lock": threading.Lock(), "seq": itertools.count(1), "written": 0, "skipped": 0, "last_error": None}
+
+def _profiler_kind():
+    if PROFILER == 'cprofile' or pyinstrument is None:
+        return 'cprofile'
+    return 'pyinstrument'
+
+def _profile_reason():
+    # streams return a generator at once and 404s have no handler worth profiling
+    if not PROFILE_DIR or request.endpoint in (None, 'api_stream'):
+        return None
+    secret = request.headers.get('X-Maxxscan-Profile')
+    if secret and PROFILE_SECRET and hmac.compare_digest(secret.encode('utf-8'), PROFILE_SECRET.encode('utf-8')):
+        return 'header'
+    if PROFILE_EVERY > 0 and next(_PROFILE["seq"]) % PROFILE_EVERY == 0:
+        return 'sampled'
+    return None
+
+def _start_profile(reason):
+    if not _PROFILE["lock"].acquire(blocking=False):
+        _PROFILE["skipped"] += 1
+        return None
+    kind = _profiler_kind()
+    try:
+        if kind == 'pyinstrument':
+            prof = pyinstrument.Profiler(interval=0.001)
+            prof.start()
+        else:
+            prof = cProfile.Profile()
+            prof.enable()
     except Exception as e:
-        print(f"\n!!! ERROR loading CSV: {e}")
-        traceback.print_exc()
-        p = _empty_api_payload(f"{type(e).__name__}: {e}")
-        p["file"] = os.path.basename(path) if path else None
-        return p
+        _PROFILE["lock"].release()
+        _PROFILE["last_error"] = f"{type(e).__name__}: {e}"
+        return None
+    return {"kind": kind, "prof": prof, "reason": reason, "t0": time.perf_counter()}
+
+def _profile_files():
+    try:
+        entries = [e for e in os.scandir(PROFILE_DIR) if e.name.endswith(_PROFILE_SUFFIXES)]
+    except OSError:
+        return []
+    files = []
+    for e in entries:
+        try:
+            st = e.stat()
+        except OSError:
+            continue
+        files.append((e.name, st.st_size, st.st_mtime))
+    return sorted(files, key=lambda f: (f[2], f[0]))
+
+def _trim_profiles():
+    files = _profile_files()
+    total = sum(f[1] for f in files)
+    for name, size, _ in files[:-1]:
+        if total <= PROFILE_MAX_BYTES:
+            break
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            pass
+        total -= size
+
+def _finish_profile(run):
+    prof = run["prof"]
+    try:
+        if run["kind"] == 'pyinstrument':
+            prof.stop()
+        else:
+            prof.disable()
+    finally:
+        _PROFILE["lock"].release()
+    ms = int((time.perf_counter() - run["t0"]) * 1000)
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-')[:48] or 'root'
+    name = f"{datetime.now():%Y%m%d-%H%M%S-%f}_{os.getpid()}_{run['reason']}_{slug}_{ms}ms"
+    name += '.speedscope.json' if run["kind"] == 'pyinstrument' else '.prof'
+    path = os.path.join(PROFILE_DIR, name)
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if run["kind"] == 'pyinstrument':
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                f.write(prof.output(renderer=SpeedscopeRenderer()))
+        else:
+            prof.dump_stats(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        _PROFILE["written"] += 1
+        _trim_profiles()
+    except Exception as e:
+        _PROFILE["last_error"] = f"{type(e).__name__}: {e}"
+
+def profile_status():
+    if not PROFILE_DIR:
+        return {"enabled": False}
+    files = _profile_files()
+    return {"enabled": True, "dir": PROFILE_DIR, "every": PROFILE_EVERY, "header": PROFILE_SECRET is not None,
+            "profiler": _profiler_kind(), "files": len(files), "bytes": sum(f[1] for f in files),
+            "max_bytes": PROFILE_MAX_BYTES, "written": _PROFILE["written"], "skipped": _PROFILE["skipped"],
+            "last_error": _PROFILE["last_error"]}
+
+@app.before_request
+def _profile_start():
+    reason = _profile_reason()
+    if reason:
+        request.environ['maxxscan.profile'] = _start_profile(reason)
+
+@app.teardown_request
+def _profile_stop(exc):
+    run = request.environ.pop('maxxscan.profile', None)
+    if run:
+        _finish_profile(run)
+
+# Terminal UI: TERMINAL_HTML is rendered once at import and its <style> and
+# <script> blocks split out into content-hashed /assets files, so they can be
+# cached as immutable for a year. Every body is precompressed at maximum
+# levels; the remaining HTML shell is a few KB and revalidated by ETag.
+_ASSET_MAX_AGE = 365 * 24 * 3600
+
+def _ui_part(raw, mimetype):
+    return {"etag": hashlib.sha256(raw).hexdigest()[:16], "mimetype": mimetype,
+            "bodies": _encode_bodies(raw, gzip_level=9, br_quality=11)}
+
+def _build_ui(template):
+    html = app.jinja_env.from_string(template).render()
+    assets = {}
+    for tag, ext, mimetype, ref in (('style', 'css', 'text/css', '<link rel="stylesheet" href="/assets/{}">'),
+                                    ('script', 'js', 'text/javascript', '<script src="/assets/{}"></script>')):
+        m = re.search(rf'<{tag}>(.*?)</{tag}>', html, re.S)
+        part = _ui_part(m.group(1).strip().encode('utf-8') + b'\n', mimetype)
+        name = f"terminal.{part['etag'][:12]}.{ext}"
+        assets[name] = part
+        html = html[:m.start()] + ref.format(name) + html[m.end():]
+    return {"shell": _ui_part(html.encode('utf-8'), 'text/html'), "assets": assets}
+
+_UI = _build_ui(TERMINAL_HTML)
+
+def _ui_response(part, cache_control):
+    enc = _pick_encoding(part["bodies"])
+    etag = part["etag"] + ("" if enc == 'identity' else "-" + enc)
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(part["bodies"][enc], mimetype=part["mimetype"])
+        if enc != 'identity':
+            resp.headers['Content-Encoding'] = enc
+    resp.set_etag(etag)
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers['Cache-Control'] = cache_control
+    return resp
 
 @app.route('/')
 def index():
-    try:
-        return render_template_string(TERMINAL_HTML)
-    except Exception:
-        return f"<html><body style='background:#111;color:#f90;font-family:monospace;padding:40px'><h1>Render Error</h1><pre style='color:#ff5252'>{traceback.format_exc()}</pre></body></html>", 500
+    return _ui_response(_UI["shell"], 'no-cache')
+
+@app.route('/assets/<name>')
+def ui_asset(name):
+    part = _UI["assets"].get(name)
+    if part is None:
+        return jsonify({"error": f"Unknown asset: {name}"}), 404
+    return _ui_response(part, f'public, max-age={_ASSET_MAX_AGE}, immutable')
 
 @app.route('/api/data')
 def api_data():
     try:
-        return jsonify(load_csv_data())
+        fmt = request.args.get('format') or _negotiate_format()
+        if fmt not in _DATA_FORMATS and fmt not in _FEED_FORMATS:
+            return jsonify(_empty_api_payload(f"Unknown format: {fmt}")), 400
+        if fmt in _FEED_FORMATS and not _FEED_FORMATS[fmt]["available"]():
+            return jsonify(_empty_api_payload(f"format={fmt} needs {_FEED_FORMATS[fmt]['needs']} installed on the server")), 406
+        query = None
+        try:
+            cols = _parse_cols(request.args)
+            if any(k in request.args for k in _QUERY_PARAMS):
+                if fmt != 'json':
+                    return jsonify(_empty_api_payload(f"Query parameters need format=json, got: {fmt}")), 400
+                query = _parse_query(request.args)
+        except ValueError as e:
+            return jsonify(_empty_api_payload(str(e))), 400
+        snap = get_snapshot()
+        if snap["id"] is None:
+            return jsonify(snap["payload"])
+        if query is not None:
+            return _query_response(snap, *query, cols)
+        mimetype = _FEED_FORMATS[fmt]["mimetype"] if fmt in _FEED_FORMATS else 'application/json'
+        if cols is not None:
+            resp = projection_response(snap, f"{fmt}-{_cols_tag(cols)}", lambda: _projected_bodies(snap, fmt, cols), mimetype)
+        elif fmt in _FEED_FORMATS:
+            resp = snapshot_response(snap, fmt, lambda s: _feed_bodies(fmt, s["payload"]), mimetype)
+        else:
+            resp = snapshot_response(snap, fmt, _DATA_FORMATS[fmt])
+        if 'format' not in request.args:
+            resp.headers['Vary'] = 'Accept, Accept-Encoding'
+        return resp
     except Exception as e:
         traceback.print_exc()
         return jsonify(_empty_api_payload(f"{type(e).__name__}: {e}")), 500
 
+@app.route('/api/data/delta')
+def api_data_delta():
+    try:
+        snap = get_snapshot()
+        if snap["id"] is None:
+            return jsonify(snap["payload"])
+        try:
+            cols = _parse_cols(request.args)
+        except ValueError as e:
+            return jsonify(_empty_api_payload(str(e))), 400
+        since = request.args.get('since', '')
+        old = snap if since == snap["id"] else _recent_snapshot(since)
+        if old is None:
+            return jsonify({"full": True, "since": since, "snapshot_id": snap["id"], "error": None})
+        if cols is not None:
+            build = lambda: _json_body(_project_delta(_build_delta(old, snap), cols))
+            return projection_response(snap, f"delta-{since}-{_cols_tag(cols)}", build)
+        return snapshot_response(snap, "delta-" + since, lambda s: _json_body(_build_delta(old, s)))
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify(_empty_api_payload(f"{type(e).__name__}: {e}")), 500
+
+@app.route('/api/symbol/<path:sym>')
+def api_symbol(sym):
+    try:
+        snap = get_snapshot()
+        if snap["id"] is None:
+            return jsonify(snap["payload"])
+        row = lookup_symbol(snap, sym)
+        if row is None:
+            return jsonify({"symbol": sym, "row": None, "snapshot_id": snap["id"], "error": f"Unknown symbol: {sym}"}), 404
+        resp = jsonify({"symbol": sym, "row": row, "columns": COLUMNS, "snapshot_id": snap["id"],
+                        "modified": snap["payload"]["modified"], "error": None})
+        resp.set_etag(snap["id"] + "-s-" + sym.upper())
+        resp.headers['Cache-Control'] = 'no-cache'
+        return resp.make_conditional(request)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify(_empty_api_payload(f"{type(e).__name__}: {e}")), 500
+
+@app.route('/api/history')
+def api_history_index():
+    info = history_status()
+    if info["enabled"]:
+        with _HISTORY["lock"]:
+            info["entries"] = list(_manifest())
+    return jsonify(info)
+
+@app.route('/api/history/<path:sym>')
+def api_history(sym):
+    if not HISTORY_DIR:
+        return jsonify({"symbol": sym, "error": "History is disabled; set --history-dir or MAXXSCAN_HISTORY_DIR"}), 404
+    fields = [f for f in request.args.get('fields', ','.join(HISTORY_FIELDS)).split(',') if f]
+    bad = [f for f in fields if f not in COLUMNS]
+    if bad:
+        return jsonify({"symbol": sym, "error": f"Unknown field: {','.join(bad)}"}), 400
+    try:
+        return jsonify(symbol_history(sym, fields, request.args.get('day') or None))
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"symbol": sym, "error": f"{type(e).__name__}: {e}"}), 500
+
+@app.route('/api/stream')
+def api_stream():
+    # a single-threaded worker (gunicorn's default sync class) would be held by
+    # the stream until its timeout; 204 tells EventSource to stop and the page polls
+    if not request.environ.get('wsgi.multithread'):
+        return Response(status=204, headers={'Cache-Control': 'no-cache'})
+    # change events come from the watcher, so make sure this process runs one
+    # (shared snapshots with a dedicated publisher are followed by generation)
+    if not (SHARED_DIR and SHARED_PUBLISHER):
+        start_watcher()
+    seen = request.headers.get('Last-Event-ID') or request.args.get('since')
+    return Response(_sse_stream(seen), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/status')
 def api_status():
     try:
@@ -818,6 +3135,10 @@ def api_status():
     except Exception as e:
         return jsonify({"ok":False,"error":str(e)}), 500
 
+@app.route('/api/metrics')
+def api_metrics():
+    return Response(metrics_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/debug')
 def api_debug():
     path = get_csv_path()
@@ -828,16 +3149,44 @@ def api_debug():
         "exists": os.path.isfile(path) if path else False,
         "app_dir": APP_DIR,
         "columns": len(COLUMNS),
+        "engine": INGEST_ENGINE if INGEST_ENGINE in _ENGINES else "stdlib",
         "template": "embedded"
     }
+    if SHARD_PATTERN:
+        run = find_latest_run(CSV_FOLDER) if _sharded() else None
+        info["shards"] = {"pattern": SHARD_PATTERN, "min_count": SHARD_COUNT, "workers": _shard_workers(),
+                          "run": [os.path.basename(p) for p in run] if run else None,
+                          "pool_parses": _SHARD_POOL["parses"], "pool_fallbacks": _SHARD_POOL["fallbacks"]}
     try:
         data = load_csv_data()
         info["rows"] = data["total"]
         info["error"] = data["error"]
     except Exception as e:
         info["error"] = str(e)
+    info["cache"] = snapshot_stats()
+    info["watcher"] = watcher_status()
+    info["history"] = history_status()
+    info["folder_index"] = folder_index_status()
+    info["shared"] = shared_status()
+    info["profiling"] = profile_status()
+    info["pid"] = os.getpid()
     return jsonify(info)
 
+@app.route('/api/debug/profiles')
+def api_debug_profiles():
+    info = profile_status()
+    if info["enabled"]:
+        info["profiles"] = [{"name": name, "bytes": size, "modified": datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S"),
+                             "format": "speedscope" if name.endswith('.speedscope.json') else "pstats"}
+                            for name, size, mtime in reversed(_profile_files())]
+    return jsonify(info)
+
+@app.route('/api/debug/profiles/<name>')
+def api_debug_profile(name):
+    if not PROFILE_DIR or not name.endswith(_PROFILE_SUFFIXES):
+        return jsonify({"name": name, "error": "Unknown profile"}), 404
+    return send_from_directory(PROFILE_DIR, name, as_attachment=True)
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='MAXXSCAN Terminal')
     parser.add_argument('--csv', type=str, default=DEFAULT_CSV_PATH)
@@ -846,10 +3195,40 @@ if __name__ == '__main__':
     parser.add_argument('--host', type=str, default='127.0.0.1')
     parser.add_argument('--debug', action='store_true', default=False)
     parser.add_argument('--reloader', action='store_true', default=False)
+    parser.add_argument('--engine', type=str, default=INGEST_ENGINE, choices=['stdlib', 'pyarrow'])
+    parser.add_argument('--watch', action='store_true', default=WATCH, help='pre-parse new CSVs in a background thread')
+    parser.add_argument('--pattern', type=str, default=CSV_PATTERN, help='filename pattern for CSVs in --folder')
+    parser.add_argument('--order', type=str, default=CSV_ORDER, choices=['mtime', 'name'], help='pick the newest CSV by mtime or by the timestamp in its name')
+    parser.add_argument('--shards', type=str, default=SHARD_PATTERN, help='regex grouping CSVs in --folder into sharded runs (group "run" or 1 = run id)')
+    parser.add_argument('--shard-count', type=int, default=SHARD_COUNT, help='shards a run needs before it is loaded')
+    parser.add_argument('--shard-workers', type=int, default=SHARD_WORKERS, help='processes parsing shards (0 = one per core)')
+    parser.add_argument('--history-dir', type=str, default=HISTORY_DIR, help='archive every snapshot here for /api/history')
+    parser.add_argument('--history-backfill', action='store_true', default=False, help='archive older CSVs in --folder on startup')
+    parser.add_argument('--profile-dir', type=str, default=PROFILE_DIR, help='write request profiles here (see --profile-every / --profile-secret)')
+    parser.add_argument('--profile-every', type=int, default=PROFILE_EVERY, help='profile every Nth request (0 = only on the secret header)')
+    parser.add_argument('--profile-secret', type=str, default=PROFILE_SECRET, help='profile requests whose X-Maxxscan-Profile header matches')
     args = parser.parse_args()
 
     CSV_PATH = args.csv
     CSV_FOLDER = args.folder
+    INGEST_ENGINE = args.engine
+    CSV_PATTERN = args.pattern
+    CSV_ORDER = args.order
+    SHARD_PATTERN = args.shards
+    SHARD_COUNT = args.shard_count
+    SHARD_WORKERS = args.shard_workers
+    if SHARD_PATTERN:
+        try:
+            _shard_rx()
+        except re.error as e:
+            parser.error(f"--shards: {e}")
+    HISTORY_DIR = args.history_dir
+    PROFILE_DIR = args.profile_dir
+    PROFILE_EVERY = args.profile_every
+    PROFILE_SECRET = args.profile_secret
+    if SHARED_DIR and fcntl is None:
+        SHARED_DIR = None
+        print("  ⚠  MAXXSCAN_SHARED_DIR needs fcntl (POSIX) — shared snapshots disabled")
     path = get_csv_path()
 
     print()
@@ -860,6 +3239,17 @@ if __name__ == '__main__':
         print(f"  ║  CSV:  {os.path.basename(path)} ({round(os.path.getsize(path)/1024,1)} KB)")
     else:
         print(f"  ║  ⚠  CSV NOT FOUND — {args.csv}")
+    if INGEST_ENGINE not in _ENGINES:
+        print(f"  ║  ⚠  engine '{INGEST_ENGINE}' unavailable — using stdlib")
+    if SHARD_PATTERN:
+        run = find_latest_run(CSV_FOLDER) if _sharded() else None
+        print(f"  ║  RUN:  {_shard_run(os.path.basename(run[-1])) + f' ({len(run)} shards, {_shard_workers()} workers)' if run else '⚠  no sharded run in --folder'}")
+    if HISTORY_DIR:
+        print(f"  ║  HIST: {HISTORY_DIR}")
+    if SHARED_DIR:
+        print(f"  ║  SHM:  {SHARED_DIR}")
+    if PROFILE_DIR:
+        print(f"  ║  PROF: {PROFILE_DIR} ({_profiler_kind()}, every {PROFILE_EVERY or '-'}{', header' if PROFILE_SECRET else ''})")
     print(f"  ║  URL:  http://{args.host}:{args.port}")
     print(f"  ╚══════════════════════════════════════════════════╝")
     print()
@@ -869,4 +3259,11 @@ if __name__ == '__main__':
         extra['use_reloader'] = True
         extra['reloader_type'] = 'stat'
 
+    # with a reloader, only the serving child runs the watcher
+    if not (args.reloader or args.debug) or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        if args.watch:
+            start_watcher()
+        if args.history_backfill:
+            backfill_history()
+
     app.run(host=args.host, port=args.port, debug=args.debug, **extra)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASGI entry point for MAXXSCAN, for many concurrent long-lived clients:
+
+    uvicorn asgi:app --port 5000
+    hypercorn asgi:app --bind 127.0.0.1:5000
+
+/api/stream is served natively: one pump waits for snapshot changes and wakes
+every connected EventSource at once, so idle tabs cost a coroutine rather than
+a thread. Every other route runs the Flask app unchanged on a thread pool, so
+CSV parsing and file I/O never block the event loop.
+"""
+
+import io
+import os
+import sys
+import time
+import asyncio
+import argparse
+import concurrent.futures
+
+import app as maxx
+
+ASGI_THREADS = int(os.environ.get('MAXXSCAN_ASGI_THREADS', '16'))
+
+_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix="maxxscan-asgi")
+# latest snapshot plus an Event that is swapped out and set on every change
+_FANOUT = {"snap": None, "changed": None, "pump": None, "clients": 0, "stopping": False}
+
+def _environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        # WSGI wants the percent-decoded path (as latin-1 bytes), which is ASGI's "path"
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': str(client[0]),
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+        else:
+            key = 'HTTP_' + name
+            environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+def _call_wsgi(environ):
+    started = {}
+    def start_response(status, headers, exc_info=None):
+        started['status'], started['headers'] = status, headers
+        return lambda data: None
+    result = maxx.app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return started['status'], started['headers'], body
+
+async def _wsgi(scope, receive, send):
+    chunks = []
+    while True:
+        msg = await receive()
+        if msg['type'] == 'http.disconnect':
+            return
+        chunks.append(msg.get('body', b''))
+        if not msg.get('more_body'):
+            break
+    loop = asyncio.get_running_loop()
+    status, headers, body = await loop.run_in_executor(_POOL, _call_wsgi, _environ(scope, b''.join(chunks)))
+    await send({'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]})
+    await send({'type': 'http.response.body', 'body': body})
+
+def _next_snapshot(seen):
+    # blocking; runs on the pool and returns as soon as a different snapshot is
+    # live, or None once lifespan shutdown sets "stopping"
+    while not _FANOUT["stopping"]:
+        snap = maxx.get_snapshot() if maxx.SHARED_DIR else maxx._SNAPSHOT
+        if snap["id"] is not None and snap["id"] != seen:
+            return snap
+        cond = maxx._SNAPSHOT_CHANGED
+        with cond:
+            if maxx._SNAPSHOT["id"] == seen and not _FANOUT["stopping"]:
+                cond.wait(maxx.WATCH_INTERVAL if maxx.SHARED_DIR else 30)
+    return None
+
+async def _pump():
+    loop = asyncio.get_running_loop()
+    seen = None
+    while True:
+        snap = await loop.run_in_executor(_POOL, _next_snapshot, seen)
+        if snap is None:
+            return
+        seen = snap["id"]
+        changed = _FANOUT["changed"]
+        _FANOUT["snap"], _FANOUT["changed"] = snap, asyncio.Event()
+        changed.set()
+
+def _start_pump():
+    if _FANOUT["pump"] is None or _FANOUT["pump"].done():
+        if not (maxx.SHARED_DIR and maxx.SHARED_PUBLISHER):
+            maxx.start_watcher()
+        _FANOUT["changed"] = asyncio.Event()
+        _FANOUT["pump"] = asyncio.get_running_loop().create_task(_pump())
+
+async def _stream(scope, receive, send):
+    _start_pump()
+    headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', ())}
+    query = dict(p.split('=', 1) for p in scope.get('query_string', b'').decode('latin-1').split('&') if '=' in p)
+    seen = headers.get('last-event-id') or query.get('since')
+    gone = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        gone.set()
+
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache'),
+                            (b'x-accel-buffering', b'no')]})
+    watcher = asyncio.get_running_loop().create_task(watch_disconnect())
+    _FANOUT["clients"] += 1
+    try:
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+        deadline = time.monotonic() + maxx.SSE_MAX_AGE
+        while not gone.is_set() and time.monotonic() < deadline:
+            snap, changed = _FANOUT["snap"], _FANOUT["changed"]
+            if snap is not None and snap["id"] != seen:
+                seen = snap["id"]
+                await send({'type': 'http.response.body', 'body': maxx._sse_event(snap).encode('utf-8'), 'more_body': True})
+                continue
+            waiters = [asyncio.ensure_future(changed.wait()), asyncio.ensure_future(gone.wait())]
+            done, pending = await asyncio.wait(waiters, timeout=min(maxx.SSE_HEARTBEAT, max(0.0, deadline - time.monotonic())),
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for w in pending:
+                w.cancel()
+            if not done:
+                await send({'type': 'http.response.body', 'body': b': heartbeat\n\n', 'more_body': True})
+        if not gone.is_set():
+            await send({'type': 'http.response.body', 'body': b''})
+    except OSError:
+        pass
+    finally:
+        _FANOUT["clients"] -= 1
+        watcher.cancel()
+
+async def _lifespan(receive, send):
+    while True:
+        msg = await receive()
+        if msg['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif msg['type'] == 'lifespan.shutdown':
+            # a running _next_snapshot cannot be cancelled; wake it so the pool can exit
+            _FANOUT["stopping"] = True
+            with maxx._SNAPSHOT_CHANGED:
+                maxx._SNAPSHOT_CHANGED.notify_all()
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    if scope['path'] == '/api/stream' and scope['method'] == 'GET':
+        return await _stream(scope, receive, send)
+    return await _wsgi(scope, receive, send)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='MAXXSCAN Terminal (ASGI)')
+    parser.add_argument('--csv', type=str, default=maxx.CSV_PATH or maxx.DEFAULT_CSV_PATH)
+    parser.add_argument('--folder', type=str, default=maxx.CSV_FOLDER)
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("uvicorn is not installed; run with any ASGI server, e.g. `hypercorn asgi:app`")
+    maxx.CSV_PATH, maxx.CSV_FOLDER = args.csv, args.folder
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
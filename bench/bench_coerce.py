@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rows/sec of the legacy per-cell coercion loop vs the precompiled coercion plan
+on a synthetic screener CSV (default 100k rows).
+
+    python bench/bench_coerce.py --rows 100000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import app
+from legacy import legacy_parse
+from synth import write_screener_csv
+
+def _best(fn, repeat):
+    best, rows = None, 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = len(fn())
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return rows, best
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV coercion throughput benchmark')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_screener_csv(os.path.join(tmp, 'screener_master.csv'), args.rows)
+        st = os.stat(path)
+        if legacy_parse(path) != app._parse_csv(path, st)["rows"]:
+            sys.exit("legacy and current parsers disagree")
+        results = {}
+        for name, fn in (('legacy', lambda: legacy_parse(path)), ('plan', lambda: app._parse_csv(path, st)["rows"])):
+            rows, dt = _best(fn, args.repeat)
+            results[name] = rows / dt
+            print(f"  {name:<8} {rows} rows in {dt:.3f}s  -> {rows / dt:,.0f} rows/sec")
+        print(f"  speedup x{results['plan'] / results['legacy']:.2f}")
+
+if __name__ == '__main__':
+    main()
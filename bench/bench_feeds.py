@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON vs MessagePack vs Arrow IPC for /api/data consumers. For each synthetic
+screener size it builds every feed body from one snapshot and reports:
+
+  * encode: server time to build the uncompressed body (best of --repeat);
+  * bytes identity / gzip / br as served;
+  * decode: client time from the uncompressed body to a usable structure
+    (json.loads / msgpack.unpackb / pyarrow Table), and to plain row lists
+    through maxxscan_client.rows().
+
+    python bench/bench_feeds.py --sizes 10000,50000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import app
+import maxxscan_client
+from synth import write_screener_csv
+
+def _best(fn, repeat):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+def _feeds():
+    feeds = {"json": lambda p: app._json_body(p)["identity"]}
+    for fmt, f in app._FEED_FORMATS.items():
+        if f["available"]():
+            feeds[fmt] = lambda p, body=f["body"]: body(p)
+        else:
+            print(f"  skipping {fmt}: needs {f['needs']}")
+    return feeds
+
+def run(rows, repeat, seed):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_screener_csv(os.path.join(tmp, f'screener_{rows}.csv'), rows, seed=seed)
+        app.CSV_PATH, app.CSV_FOLDER = path, None
+        app._SNAPSHOT = app._new_snapshot(None, None)
+        payload = app.load_csv_data()
+        if payload["error"] is not None:
+            sys.exit(f"parse failed: {payload['error']}")
+    results = {}
+    for fmt, build in _feeds().items():
+        enc_s, raw = _best(lambda: build(payload), repeat)
+        bodies = app._encode_bodies(raw)
+        dec_s, snap = _best(lambda: maxxscan_client.decode(raw, fmt), repeat)
+        rows_s, plain = _best(lambda: maxxscan_client.rows(snap), repeat)
+        if plain != [list(r) for r in payload["rows"]]:
+            sys.exit(f"{fmt}: decoded rows differ from the snapshot")
+        results[fmt] = {"encode_ms": round(enc_s * 1000, 2), "decode_ms": round(dec_s * 1000, 2),
+                        "to_rows_ms": round(rows_s * 1000, 2),
+                        **{f"{enc}_bytes": len(b) for enc, b in bodies.items()}}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Feed format encode/decode/size comparison')
+    parser.add_argument('--sizes', type=str, default='10000,50000')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true', default=False)
+    args = parser.parse_args()
+
+    report = {}
+    for rows in [int(s) for s in args.sizes.split(',') if s]:
+        report[rows] = res = run(rows, args.repeat, args.seed)
+        if args.json:
+            continue
+        print(f"  {rows} rows")
+        print(f"    {'format':<8} {'encode':>10} {'decode':>10} {'to rows':>10} {'identity':>11} {'gzip':>10} {'br':>10}")
+        for fmt, r in res.items():
+            print(f"    {fmt:<8} {r['encode_ms']:>8.1f}ms {r['decode_ms']:>8.1f}ms {r['to_rows_ms']:>8.1f}ms "
+                  f"{r['identity_bytes'] / 1024:>9.0f}KB {r['gzip_bytes'] / 1024:>8.0f}KB "
+                  f"{r.get('br_bytes', 0) / 1024:>8.0f}KB")
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
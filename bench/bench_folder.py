@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latest-CSV resolution in a folder of archived runs (default 10k files): the
+legacy glob + getmtime scan vs the cached folder index, for an unchanged
+folder, after a new file lands, and with name-timestamp ordering.
+
+    python bench/bench_folder.py --files 10000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import app
+from legacy import legacy_find_latest_csv
+
+def _per_call(fn, calls):
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        out = fn()
+    return out, (time.perf_counter() - t0) / calls
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV folder resolution benchmark')
+    parser.add_argument('--files', type=int, default=10000)
+    parser.add_argument('--calls', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = time.time() - args.files
+        for i in range(args.files):
+            t = time.localtime(base + i)
+            path = os.path.join(tmp, time.strftime('screener_master_%Y%m%d_%H%M%S', t) + f'_{i:05d}.csv')
+            with open(path, 'w') as f:
+                f.write('symbol\n')
+            os.utime(path, (base + i, base + i))
+        with open(os.path.join(tmp, 'notes.txt'), 'w') as f:
+            f.write('not a csv\n')
+
+        legacy, dt_legacy = _per_call(lambda: legacy_find_latest_csv(tmp), max(1, args.calls // 20))
+        print(f"  legacy glob+getmtime   {dt_legacy * 1e3:9.3f} ms/call  -> {os.path.basename(legacy)}")
+
+        app.CSV_FOLDER, app.CSV_PATTERN, app.CSV_ORDER = tmp, '*.csv', 'mtime'
+        app.invalidate_folder_index()
+        t0 = time.perf_counter()
+        cold = app.find_latest_csv(tmp)
+        print(f"  index cold scan        {(time.perf_counter() - t0) * 1e3:9.3f} ms       -> {os.path.basename(cold)}")
+        warm, dt_warm = _per_call(lambda: app.find_latest_csv(tmp), args.calls)
+        print(f"  index warm (unchanged) {dt_warm * 1e3:9.3f} ms/call  x{dt_legacy / dt_warm:,.0f}")
+        if not (legacy == cold == warm):
+            sys.exit("legacy and indexed resolution disagree")
+
+        path = os.path.join(tmp, 'screener_master_29991231_235959.csv')
+        with open(path, 'w') as f:
+            f.write('symbol\n')
+        t0 = time.perf_counter()
+        new = app.find_latest_csv(tmp)
+        print(f"  index after new file   {(time.perf_counter() - t0) * 1e3:9.3f} ms       -> {os.path.basename(new)}")
+        if new != path:
+            sys.exit("index missed the new file")
+
+        app.CSV_PATTERN, app.CSV_ORDER = 'screener_master_*.csv', 'name'
+        t0 = time.perf_counter()
+        named = app.find_latest_csv(tmp)
+        print(f"  name order cold scan   {(time.perf_counter() - t0) * 1e3:9.3f} ms       -> {os.path.basename(named)}")
+        scans = app.folder_index_status()["scans"]
+        print(f"  full scans: {scans} for {args.calls + 3} lookups")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sync vs async serving under many long-lived clients. For each mode it opens N
+EventSource-style connections to /api/stream (default 500), then measures:
+
+  * /api/status latency (p50/p99) from a separate pool of short requests
+    while those streams stay open;
+  * push fan-out: time from rewriting the CSV to each stream seeing the event.
+
+sync  = gunicorn gthread workers running app:app (one thread per open stream)
+async = uvicorn running asgi:app
+
+    python bench/bench_load.py --clients 500 --requests 300
+"""
+
+import os
+import sys
+import time
+import json
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synth import write_screener_csv
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _pct(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+async def _get(port, path, timeout):
+    t0 = time.perf_counter()
+    try:
+        r, w = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+        w.write(f'GET {path} HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n'.encode('ascii'))
+        await w.drain()
+        head = await asyncio.wait_for(r.readline(), timeout)
+        await asyncio.wait_for(r.read(), timeout)
+        w.close()
+        return time.perf_counter() - t0 if b' 200 ' in head else None
+    except (OSError, asyncio.TimeoutError):
+        return None
+
+async def _stream(port, ready, events, stop):
+    try:
+        r, w = await asyncio.open_connection('127.0.0.1', port)
+        w.write(b'GET /api/stream HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n')
+        await w.drain()
+        first = True
+        while not stop.is_set():
+            line = await r.readline()
+            if not line:
+                break
+            if line.startswith(b'event: snapshot'):
+                if first:
+                    first = False
+                    ready.append(time.perf_counter())
+                else:
+                    events.append(time.perf_counter())
+        w.close()
+    except (OSError, asyncio.CancelledError):
+        pass
+
+async def _run_clients(port, csv_path, rows, clients, requests, concurrency, timeout):
+    ready, events, stop = [], [], asyncio.Event()
+    tasks = []
+    for _ in range(clients):
+        tasks.append(asyncio.ensure_future(_stream(port, ready, events, stop)))
+        await asyncio.sleep(0)
+    deadline = time.monotonic() + timeout
+    while len(ready) < clients and time.monotonic() < deadline:
+        await asyncio.sleep(0.2)
+    connected = len(ready)
+
+    sem = asyncio.Semaphore(concurrency)
+    async def one():
+        async with sem:
+            return await _get(port, '/api/status', timeout)
+    lat = await asyncio.gather(*(one() for _ in range(requests)))
+    ok = [x for x in lat if x is not None]
+
+    loop = asyncio.get_running_loop()
+    t0 = time.perf_counter()
+    await loop.run_in_executor(None, write_screener_csv, csv_path, rows + 1, 11)
+    deadline = time.monotonic() + timeout
+    while len(events) < connected and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    fanout = [t - t0 for t in events]
+
+    stop.set()
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {"streams_connected": connected, "status_ok": len(ok), "status_failed": requests - len(ok),
+            "status_p50_ms": round(_pct(ok, 50) * 1000, 1), "status_p99_ms": round(_pct(ok, 99) * 1000, 1),
+            "events_delivered": len(fanout),
+            "fanout_p50_ms": round(_pct(fanout, 50) * 1000, 1), "fanout_p99_ms": round(_pct(fanout, 99) * 1000, 1)}
+
+def run(mode, args, tmp):
+    csv_path = os.path.join(tmp, f'screener_{mode}.csv')
+    write_screener_csv(csv_path, args.rows, seed=10)
+    port = _free_port()
+    env = dict(os.environ, MAXXSCAN_CSV=csv_path, MAXXSCAN_WATCH_INTERVAL='0.2', MAXXSCAN_WATCH_SETTLE='0.1')
+    env.pop('MAXXSCAN_SHARED_DIR', None)
+    if mode == 'sync':
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', os.devnull, '-w', str(args.sync_workers), '-k', 'gthread',
+               '--threads', str(args.sync_threads), '-b', f'127.0.0.1:{port}', 'app:app']
+    else:
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port), '--log-level', 'warning',
+               '--backlog', str(args.clients * 2)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 120
+        while asyncio.run(_get(port, '/api/status', 5)) is None:
+            if time.monotonic() > deadline or proc.poll() is not None:
+                sys.exit(f"{mode} server did not come up")
+            time.sleep(0.5)
+        return asyncio.run(_run_clients(port, csv_path, args.rows, args.clients, args.requests,
+                                        args.concurrency, args.timeout))
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync vs async latency under many open streams')
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--timeout', type=float, default=20.0)
+    parser.add_argument('--sync-workers', type=int, default=2)
+    parser.add_argument('--sync-threads', type=int, default=64)
+    parser.add_argument('--modes', type=str, default='sync,async')
+    parser.add_argument('--json', action='store_true', default=False)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes.split(','):
+            results[mode] = run(mode, args, tmp)
+            if not args.json:
+                r = results[mode]
+                print(f"  {mode:<6} streams {r['streams_connected']}/{args.clients}  "
+                      f"status p50 {r['status_p50_ms']} ms p99 {r['status_p99_ms']} ms "
+                      f"({r['status_failed']} failed)  fan-out p50 {r['fanout_p50_ms']} ms "
+                      f"p99 {r['fanout_p99_ms']} ms ({r['events_delivered']} delivered)")
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Peak-RSS comparison of the legacy read()+splitlines() parser and the streaming
+parser in app.py on a large synthetic screener file (default 50 MB).
+
+    python bench/bench_memory.py --mb 50
+"""
+
+import os
+import sys
+import json
+import argparse
+import resource
+import subprocess
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+def _maxrss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def _child(impl, path):
+    import app
+    from legacy import legacy_parse
+    base = _maxrss_mb()
+    if impl == 'legacy':
+        rows = legacy_parse(path)
+    else:
+        rows = app._parse_csv(path, os.stat(path))["rows"]
+    print(json.dumps({"impl": impl, "rows": len(rows), "baseline_mb": round(base, 1), "peak_mb": round(_maxrss_mb(), 1)}))
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV parser peak memory benchmark')
+    parser.add_argument('--mb', type=float, default=50)
+    parser.add_argument('--csv', type=str, default=None, help='use an existing file instead of generating one')
+    parser.add_argument('--child', nargs=2, metavar=('IMPL', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return _child(*args.child)
+
+    from synth import write_screener_csv_mb
+    tmp = None
+    path = args.csv
+    if not path:
+        tmp = tempfile.NamedTemporaryFile(suffix='.csv', delete=False)
+        tmp.close()
+        path = write_screener_csv_mb(tmp.name, args.mb)
+    try:
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"file: {path} ({size_mb:.1f} MB)")
+        results = {}
+        for impl in ('legacy', 'streaming'):
+            out = subprocess.run([sys.executable, __file__, '--child', impl, path], capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            results[impl] = r
+            print(f"  {impl:<10} rows={r['rows']:<8} peak={r['peak_mb']:>8.1f} MB  (+{r['peak_mb'] - r['baseline_mb']:.1f} MB over import)")
+        old = results['legacy']['peak_mb'] - results['legacy']['baseline_mb']
+        new = results['streaming']['peak_mb'] - results['streaming']['baseline_mb']
+        if old > 0:
+            print(f"  parse overhead reduced by {100 * (old - new) / old:.1f}%")
+    finally:
+        if tmp:
+            os.unlink(tmp.name)
+
+if __name__ == '__main__':
+    main()
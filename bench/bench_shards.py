@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sharded ingest: one synthetic universe written as a single CSV and as one
+shard per exchange (screener_<run>_<exchange>.csv, next to an older run), then
+loaded through load_csv_data() as:
+
+  * single: the one-file parse;
+  * inline: the shards parsed in this process (--shard-workers 1);
+  * pool:   the shards parsed in a process pool (--workers, default one per core),
+            timed warm, i.e. with the pool already started.
+
+The merged snapshot must hold exactly the single-file rows, in master_rank
+order. Pool speedup is bounded by the core count and by shipping parsed rows
+back to the parent.
+
+    python bench/bench_shards.py --rows 100000 --engine pyarrow
+"""
+
+import os
+import sys
+import csv
+import time
+import json
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import app
+from synth import EXCHANGES, write_screener_csv
+
+def write_run(folder, run, source, shards):
+    # split source by exchange (round-robin over --shards exchange buckets)
+    ei = app.COLUMNS.index('exchange')
+    files, writers = [], {}
+    with open(source, newline='', encoding='utf-8') as f:
+        rd = csv.reader(f)
+        header = next(rd)
+        for rec in rd:
+            k = EXCHANGES.index(rec[ei]) % shards
+            if k not in writers:
+                out = open(os.path.join(folder, f'screener_{run}_{EXCHANGES[k].lower()}.csv'), 'w', newline='', encoding='utf-8')
+                files.append(out)
+                writers[k] = csv.writer(out, lineterminator='\n')
+                writers[k].writerow(header)
+            writers[k].writerow(rec)
+    for out in files:
+        out.close()
+    return len(files)
+
+def _load(repeat, **config):
+    best, data = None, None
+    for _ in range(repeat):
+        for k, v in config.items():
+            setattr(app, k, v)
+        app._SNAPSHOT = app._new_snapshot(None, None)
+        app._RECENT.clear()
+        app.invalidate_folder_index()
+        t0 = time.perf_counter()
+        data = app.load_csv_data()
+        dt = time.perf_counter() - t0
+        if data["error"] is not None:
+            sys.exit(f"load failed: {data['error']}")
+        best = dt if best is None else min(best, dt)
+    return best, data
+
+def main():
+    parser = argparse.ArgumentParser(description='Single-file vs sharded ingest')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--shards', type=int, default=len(EXCHANGES))
+    parser.add_argument('--workers', type=int, default=0, help='pool size (0 = one per core)')
+    parser.add_argument('--engine', type=str, default=app.INGEST_ENGINE, choices=sorted(app._ENGINES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true', default=False)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        single = write_screener_csv(os.path.join(tmp, 'universe.csv'), args.rows, seed=args.seed)
+        folder = os.path.join(tmp, 'runs')
+        os.mkdir(folder)
+        old = write_screener_csv(os.path.join(tmp, 'old.csv'), 100, seed=args.seed + 1)
+        write_run(folder, '20261018-0900', old, args.shards)
+        time.sleep(0.05)
+        n = write_run(folder, '20261018-0930', single, args.shards)
+
+        app.INGEST_ENGINE = args.engine
+        t_single, base = _load(args.repeat, CSV_PATH=single, CSV_FOLDER=None, SHARD_PATTERN=None)
+        sharded = dict(CSV_FOLDER=folder, CSV_PATTERN='screener_*.csv',
+                       SHARD_PATTERN=r'screener_(?P<run>\d{8}-\d{4})_', SHARD_COUNT=n)
+        t_inline, inline = _load(args.repeat, SHARD_WORKERS=1, **sharded)
+        app.SHARD_WORKERS = args.workers
+        app._map_shards([os.path.join(folder, f) for f in sorted(os.listdir(folder))[:2]])
+        t_pool, pool = _load(args.repeat, SHARD_WORKERS=args.workers, **sharded)
+
+    want = [list(r) for r in base["rows"]]
+    for name, data in (("inline", inline), ("pool", pool)):
+        if [list(r) for r in data["rows"]] != want or data["duplicates"]:
+            sys.exit(f"{name}: merged shards differ from the single-file parse")
+    report = {"rows": args.rows, "shards": n, "workers": app._shard_workers(), "engine": args.engine,
+              "pool_fallbacks": app._SHARD_POOL["fallbacks"], "file": pool["file"],
+              "single_s": round(t_single, 4), "inline_s": round(t_inline, 4), "pool_s": round(t_pool, 4)}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"  {args.rows} rows, {n} shards ({pool['file']}), engine {args.engine}, {report['workers']} workers")
+    print(f"    single  {t_single * 1000:>9.1f} ms")
+    print(f"    inline  {t_inline * 1000:>9.1f} ms  ({t_single / t_inline:.2f}x)")
+    print(f"    pool    {t_pool * 1000:>9.1f} ms  ({t_single / t_pool:.2f}x)"
+          f"{'  [pool unavailable, ran inline]' if report['pool_fallbacks'] else ''}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Differential check of the ingest engines: every available engine must produce
+byte-identical /api/data bodies for a set of messy fixture CSVs (nan/None/null,
+blanks, stray \\r, BOM, CRLF, ragged rows, missing and extra columns, quoted
+newlines, cp1252 bytes). Every cell is quoted so stray \\r stays inside its
+field, and each fixture must map the expected number of COLUMNS, so a fixture
+that tokenizes wrongly fails instead of comparing default fills. Exits
+non-zero on any mismatch.
+
+    python bench/check_engines.py
+"""
+
+import os
+import sys
+import csv
+import random
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import app
+from synth import write_screener_csv
+
+MESSY_NUMBERS = ['', ' ', 'nan', 'NaN', ' nan\r', 'None', 'null', 'NULL', '-', 'abc', '1', '-0', '0.0',
+                 '1.5', ' 42 ', '7\r', '1e-7', '2.5E3', '.1234567', '3.14159265358979', '12345678901234567',
+                 '1_000', 'inf', '-Infinity', '0.0000005', '99999999999.123456789']
+MESSY_BOOLS = ['', 'True', 'true', ' TRUE ', '1', '0', 'yes', 'Y', 't', 'False', 'no', 'nan', 'x\r']
+MESSY_TEXT = ['', ' NASDAQ ', 'Tech, "Inc"', 'multi\nline', 'tab\there', 'x\r', 'Café', 'nan']
+
+def _messy(path, rows, encoding='utf-8', crlf=False, bom=False, drop=(), extra=False, ragged=False, seed=11):
+    rng = random.Random(seed)
+    cols = [c for c in app.COLUMNS if c not in drop] + (['unknown_col'] if extra else [])
+    rng.shuffle(cols)
+    with open(path, 'w', newline='', encoding=('utf-8-sig' if bom else encoding)) as f:
+        w = csv.writer(f, lineterminator='\r\n' if crlf else '\n', quoting=csv.QUOTE_ALL)
+        w.writerow([(' ' + c + '\r') if rng.random() < 0.1 else c for c in cols])
+        for i in range(rows):
+            rec = []
+            for c in cols:
+                if c in app.NUMERIC_COLS:
+                    v = rng.choice(MESSY_NUMBERS) if rng.random() < 0.5 else str(round(rng.uniform(-1e5, 1e5), rng.randint(0, 9)))
+                elif c in app.BOOLISH_COLS:
+                    v = rng.choice(MESSY_BOOLS)
+                elif c == 'symbol':
+                    v = 'S%d' % i
+                else:
+                    v = rng.choice(MESSY_TEXT)
+                rec.append(v)
+            if ragged and rng.random() < 0.1:
+                rec = rec[:rng.randint(1, len(rec))]
+            w.writerow(rec)
+            if rng.random() < 0.02:
+                f.write('\r\n' if crlf else '\n')
+    return path
+
+def _mapped(path):
+    # COLUMNS the header maps, read the way the engines read it
+    with open(path, newline='', encoding=app._detect_encoding(path)) as f:
+        header = {str(h).strip().strip('\ufeff') for h in next(csv.reader(f), [])}
+    return sum(c in header for c in app.COLUMNS)
+
+def fixtures(tmp):
+    # (name, path, COLUMNS the header must map)
+    n = len(app.COLUMNS)
+    yield 'synthetic', write_screener_csv(os.path.join(tmp, 'synthetic.csv'), 2000), n
+    yield 'synthetic-bom-crlf', write_screener_csv(os.path.join(tmp, 'bom.csv'), 500, bom=True, crlf=True), n
+    yield 'messy', _messy(os.path.join(tmp, 'messy.csv'), 1500), n
+    yield 'messy-crlf-bom', _messy(os.path.join(tmp, 'messy_bom.csv'), 800, crlf=True, bom=True, seed=12), n
+    yield 'missing-extra-cols', _messy(os.path.join(tmp, 'cols.csv'), 800, drop=('price', 'flag_hod', 'name'), extra=True, seed=13), n - 3
+    yield 'ragged', _messy(os.path.join(tmp, 'ragged.csv'), 800, ragged=True, seed=14), n
+    yield 'cp1252', _messy(os.path.join(tmp, 'cp1252.csv'), 500, encoding='cp1252', seed=15), n
+    yield 'header-only', _messy(os.path.join(tmp, 'empty.csv'), 0), n
+
+def main():
+    engines = list(app._ENGINES)
+    print(f"engines: {', '.join(engines)}")
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, path, want in fixtures(tmp):
+            mapped = _mapped(path)
+            if mapped < want:
+                failed += 1
+                print(f"  {name:<20} BROKEN FIXTURE: header maps {mapped}/{want} columns")
+                continue
+            bodies = {}
+            for engine in engines:
+                app.INGEST_ENGINE = engine
+                payload = app._parse_csv(path, os.stat(path))
+                if payload["error"]:
+                    bodies[engine] = payload["error"].encode('utf-8')
+                else:
+                    bodies[engine] = app.app.json.dumps(payload["rows"], separators=(",", ":")).encode('utf-8')
+            ref = bodies['stdlib']
+            bad = [e for e, b in bodies.items() if b != ref]
+            failed += bool(bad)
+            print(f"  {name:<20} {'MISMATCH: ' + ', '.join(bad) if bad else 'ok'}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
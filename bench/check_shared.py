@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Starts gunicorn with N workers on a synthetic CSV and checks that every worker
+serves the same shared snapshot while the CSV was parsed exactly once, then
+rewrites the CSV and checks that all workers move to the next generation.
+Runs twice: with the master as publisher (gunicorn_shared.conf.py) and with workers
+electing a loader among themselves. Exits non-zero on any mismatch.
+
+    python bench/check_shared.py --workers 3
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synth import write_screener_csv
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _get(url):
+    req = urllib.request.Request(url, headers={'Connection': 'close'})
+    with urllib.request.urlopen(req, timeout=30) as r:
+        return r.read()
+
+def _workers_view(base, workers, tries=300):
+    seen = {}
+    for _ in range(tries):
+        info = json.loads(_get(base + '/api/debug'))
+        seen[info["pid"]] = info
+        if len(seen) >= workers:
+            break
+    return seen
+
+def _wait(cond, timeout, what):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return
+        time.sleep(0.3)
+    sys.exit(f"timed out waiting for {what}")
+
+def run(mode, workers, rows, tmp):
+    csv_path = os.path.join(tmp, 'screener_master.csv')
+    write_screener_csv(csv_path, rows, seed=1)
+    port = _free_port()
+    base = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, MAXXSCAN_CSV=csv_path, MAXXSCAN_SHARED_DIR=os.path.join(tmp, f'shm-{mode}'),
+               MAXXSCAN_WORKERS=str(workers), MAXXSCAN_BIND=f'127.0.0.1:{port}',
+               MAXXSCAN_WATCH_INTERVAL='0.2', MAXXSCAN_WATCH_SETTLE='0.1')
+    if mode == 'master':
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_shared.conf.py', 'app:app']
+    else:
+        env.pop('MAXXSCAN_SHARED_PUBLISHER', None)
+        # an explicit empty config keeps gunicorn from picking up a local ./gunicorn.conf.py
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', os.devnull, '-w', str(workers), '-k', 'gthread', '--threads', '4',
+               '-b', f'127.0.0.1:{port}', 'app:app']
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        def up():
+            try:
+                return json.loads(_get(base + '/api/status')).get("ok")
+            except OSError:
+                return False
+        _wait(up, 120, "gunicorn to start")
+
+        def check(expect_gen):
+            seen = _workers_view(base, workers)
+            gens = {pid: i["shared"]["attached"] for pid, i in seen.items()}
+            parses = sum(i["cache"]["rebuilds"] for i in seen.values())
+            bodies = {hashlib.sha1(_get(base + '/api/data')).hexdigest() for _ in range(workers * 3)}
+            q = json.loads(_get(base + '/api/data?sort=composite_score&limit=5'))
+            print(f"  [{mode}] workers={sorted(gens)} gens={sorted(set(gens.values()))} "
+                  f"worker parses={parses} distinct bodies={len(bodies)} query rows={len(q['rows'])}/{q['matched']}")
+            ok = (len(seen) == workers and set(gens.values()) == {expect_gen} and len(bodies) == 1
+                  and q["matched"] == rows and len(q["rows"]) == 5)
+            # with a master publisher workers never parse; otherwise exactly one worker parses each version
+            ok = ok and parses == (0 if mode == 'master' else expect_gen)
+            if not ok:
+                for pid, i in sorted(seen.items()):
+                    print(f"    pid {pid}: cache={i['cache']} shared={i['shared']}")
+            return ok
+
+        if not check(1):
+            sys.exit(f"[{mode}] workers disagree on the first snapshot")
+        time.sleep(0.05)
+        write_screener_csv(csv_path, rows + 10, seed=2)
+        rows += 10
+        if mode == 'elect':
+            _get(base + '/api/status')
+        _wait(lambda: all(i["shared"]["attached"] == 2 for i in _workers_view(base, workers).values()), 60,
+              "workers to attach generation 2")
+        if not check(2):
+            sys.exit(f"[{mode}] workers disagree after the CSV changed")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared snapshot check under gunicorn')
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('master', 'elect'):
+            run(mode, args.workers, args.rows, tmp)
+    print("  ok")
+
+if __name__ == '__main__':
+    main()
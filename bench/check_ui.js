@@ -0,0 +1,96 @@
+// Mock-DOM check of the terminal's virtualized, keyed table (run through
+// bench/check_ui.py, which passes the built terminal script as argv[2]).
+// Just enough DOM for initTable/render/paintRows and the delegated handlers;
+// every insertBefore/innerHTML/outerHTML is counted so the DOM work of a
+// scroll or refresh can be asserted.
+const fs=require('fs');
+class CL{constructor(e){this.e=e}get s(){return new Set((this.e.className||'').split(/\s+/).filter(Boolean))}contains(c){return this.s.has(c)}add(c){const s=this.s;s.add(c);this.e.className=[...s].join(' ')}remove(c){const s=this.s;s.delete(c);this.e.className=[...s].join(' ')}toggle(c,f){if(f===undefined)f=!this.contains(c);f?this.add(c):this.remove(c)}}
+let writes=0,moves=0,inserts=0;
+class El{
+  constructor(tag){this.tagName=tag.toUpperCase();this.children=[];this.parent=null;this.className='';this.style={};this.dataset={};this.listeners={};this.classList=new CL(this);this.textContent='';this._html=''}
+  get parentNode(){return this.parent}
+  get firstChild(){return this.children[0]||null}get lastChild(){return this.children[this.children.length-1]||null}
+  get nextSibling(){const c=this.parent.children;return c[c.indexOf(this)+1]||null}
+  get previousSibling(){const c=this.parent.children;return c[c.indexOf(this)-1]||null}
+  insertBefore(n,ref){if(n.parent){moves++;n.parent.removeChild(n)}else inserts++;n.parent=this;this.children.splice(ref?this.children.indexOf(ref):this.children.length,0,n);return n}
+  appendChild(n){return this.insertBefore(n,null)}
+  removeChild(n){this.children.splice(this.children.indexOf(n),1);n.parent=null}
+  set innerHTML(h){writes++;this._html=h;this.children=[];
+    if(this.tagName==='TBODY'){for(const m of h.matchAll(/<tr class="(\w+)"><td[^>]*><\/td><\/tr>/g)){const tr=new El('tr');tr.className=m[1];tr.appendChild(new El('td'));this.appendChild(tr)}}
+    else if(this.tagName==='TR'){const parts=h.split(/(?=<td[ >])/).filter(x=>x.startsWith('<td'));for(const p of parts){const td=new El('td');td._html=p;const a=p.match(/data-act="(\w+)"/);if(a)td.dataset.act=a[1];this.appendChild(td)}}}
+  get innerHTML(){return this._html}
+  set outerHTML(h){writes++;this._html=h;const a=h.match(/data-act="(\w+)"/);this.dataset={};if(a)this.dataset.act=a[1]}
+  get offsetTop(){const p=this.parent;let y=0;for(const c of p.children){if(c===this)return y;y+=c.offsetHeight}}
+  get offsetHeight(){if(this.classList.contains('vspacer'))return this.style.display==='none'?0:parseFloat(this.firstChild.style.height||0);return 22}
+  addEventListener(t,f){(this.listeners[t]=this.listeners[t]||[]).push(f)}
+  closest(sel){let e=this;while(e){if(matches(e,sel))return e;e=e.parent}return null}
+  querySelectorAll(sel){const out=[];const walk=e=>{for(const c of e.children){if(matches(c,sel))out.push(c);walk(c)}};walk(this);return out}
+  querySelector(){return{textContent:''}}
+}
+function matches(e,sel){return sel.split(',').some(s=>{s=s.trim();
+  if(s==='tr[data-i]'||s==='#tbody tr[data-i]')return e.tagName==='TR'&&e.dataset.i!==undefined;
+  if(s==='tr')return e.tagName==='TR';
+  if(s==='[data-act]')return e.dataset&&e.dataset.act!==undefined;
+  if(s==='a.lk')return e.tagName==='A';
+  return false})}
+const els={};const get=id=>els[id]||(els[id]=new El(id==='tbody'?'tbody':id==='thead'?'thead':'div'));
+['archFilter','presetFilter','searchBox'].forEach(id=>get(id).value='');get('tableWrap').clientHeight=440;get('tableWrap').scrollTop=0;
+Object.defineProperty(get('thead'),'offsetHeight',{value:26});
+global.document={getElementById:get,querySelectorAll:s=>s==='#tbody tr[data-i]'?get('tbody').querySelectorAll('tr[data-i]'):[],addEventListener(){},createElement:t=>new El(t),activeElement:null};
+global.window={addEventListener(){},matchMedia:()=>({matches:false}),open(){}};
+global.location={search:''};global.localStorage={getItem:()=>null,setItem(){}};
+global.requestAnimationFrame=f=>f();global.navigator={clipboard:{writeText:()=>Promise.resolve()}};
+
+let js=fs.readFileSync(process.argv[2],'utf8').replace(/\ninit\(\);\s*$/,'\n');
+js+=`
+;C={};['master_rank','symbol','name','px_eff','chg_eff','flag_hod'].forEach((c,i)=>C[c]=i);
+ALL_DATA=[];for(let i=0;i<5000;i++)ALL_DATA.push([i+1,'S'+i,'N'+i,i/10,i%7-3,i%3===0]);
+filtered=ALL_DATA.slice();displayCount=99999;initTable();startEngine();
+window.__t={get vStart(){return vStart},get vEnd(){return vEnd},get selectedIdx(){return selectedIdx},set selectedIdx(v){selectedIdx=v},render,scrollToSelected,renderSelection,get shownRows(){return shownRows},applyFilters,loadEngine,setAll(v){ALL_DATA=v},get ALL(){return ALL_DATA},get filtered(){return filtered},set filtered(v){filtered=v},pinnedSymbols,onRowClick};
+global.openDetail=function(r){window.__opened=r};
+`;
+js=js.replace('function openDetail(','function openDetail_orig(').replace(/function updateStats\(shown\)\{/,'function updateStats(shown){return;');
+eval(js);
+
+let failed=0;
+const expect=(label,ok,detail)=>{failed+=!ok;console.log(`  ${label.padEnd(34)} ${ok?'ok':'FAIL'}${detail?'  '+detail:''}`)};
+const T=window.__t,tb=get('tbody'),wrap=get('tableWrap');
+const rowsInDom=()=>tb.children.filter(c=>c.dataset.i!==undefined);
+const windowOk=label=>{
+  const rs=rowsInDom(),total=tb.children.reduce((a,c)=>a+c.offsetHeight,0);
+  const bound=rs.every((r,k)=>+r.dataset.i===T.vStart+k&&r._row===T.shownRows[+r.dataset.i]);
+  expect(label,bound&&total===T.shownRows.length*22,`rows ${T.vStart}-${T.vEnd} height ${total}/${T.shownRows.length*22}`)};
+const scrollTo=y=>{wrap.scrollTop=y;wrap.listeners.scroll[0]()};
+
+// virtualized window (user-019)
+T.render();windowOk('initial window');
+writes=0;scrollTo(22*2000);windowOk('scroll to row 2000');
+writes=0;scrollTo(22*2001);windowOk('scroll one row');expect('one-row scroll writes one row',writes===1,`writes ${writes}`);
+writes=0;T.render();expect('re-render unchanged: no writes',writes===0,`writes ${writes}`);
+const tr=rowsInDom()[5];
+T.onRowClick({target:tr.children[6]});
+expect('delegated click selects/opens',T.selectedIdx===+tr.dataset.i&&window.__opened&&window.__opened[1]===tr._row[1]&&tr.classList.contains('selected'));
+T.onRowClick({target:tr.children[0]});
+expect('delegated pin',T.pinnedSymbols.has(tr._row[1])&&rowsInDom()[5].classList.contains('pinned'));
+T.selectedIdx=4990;T.scrollToSelected();T.renderSelection();windowOk('keyboard to row 4990');
+expect('selected row in window',rowsInDom().some(r=>r.classList.contains('selected')&&+r.dataset.i===4990));
+T.filtered=T.filtered.slice(0,30);T.render();windowOk('filter shrinks while scrolled');
+T.filtered=[];T.render();windowOk('empty list');
+
+// keyed refresh (user-020): 3 changed cells, one insert, one removal, one swap
+T.pinnedSymbols.clear();T.filtered=T.ALL.slice();wrap.scrollTop=0;T.render();
+T.selectedIdx=10;T.render();const selSym=T.shownRows[10][1];
+const fresh=T.ALL.map(r=>r.slice());
+fresh[3][3]=999;fresh[4][4]=42;fresh[7][2]='Renamed';
+fresh.splice(6,1);
+fresh.splice(5,0,[0,'NEW','New Co',1,1,false]);
+const t=fresh[1];fresh[1]=fresh[20];fresh[20]=t;
+T.setAll(fresh);T.loadEngine();writes=0;moves=0;inserts=0;T.applyFilters(true);
+const dom=rowsInDom();
+const flashes=dom.reduce((a,r)=>a+r.children.filter(td=>td.classList.contains('flash')).length,0);
+expect('refresh keeps symbol order',dom.every((r,k)=>r._sym===T.shownRows[T.vStart+k][1]));
+expect('refresh DOM work',writes===4&&moves===3&&flashes===3,`writes ${writes} moves ${moves} flashed ${flashes}`);
+expect('refresh keeps selection',T.shownRows[T.selectedIdx][1]===selSym);
+writes=0;moves=0;T.setAll(T.ALL.map(r=>r.slice()));T.applyFilters(true);
+expect('identical refresh: no DOM work',writes===0&&moves===0,`writes ${writes} moves ${moves}`);
+process.exit(failed?1:0);
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Runs bench/check_ui.js under node against the terminal script exactly as
+/assets serves it: a mock DOM with 5k rows checks the virtualized window
+(spacer heights, one write per one-row scroll, no writes when nothing
+changed, delegated select/pin) and the keyed refresh (DOM writes/moves and
+flashed cells for a known change set, selection kept). Exits non-zero on any
+failure, or when node is not installed.
+
+    python bench/check_ui.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import app
+
+def main():
+    node = shutil.which('node')
+    if node is None:
+        sys.exit("node is not installed")
+    script = next(p for name, p in app._UI["assets"].items() if name.endswith('.js'))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'terminal.js')
+        with open(path, 'wb') as f:
+            f.write(script["bodies"]["identity"])
+        sys.exit(subprocess.run([node, os.path.join(BENCH_DIR, 'check_ui.js'), path]).returncode)
+
+if __name__ == '__main__':
+    main()
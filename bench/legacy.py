@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+The pre-streaming load_csv_data() parse loop (full read + splitlines + DictReader
++ per-cell set lookups) and the glob-based find_latest_csv(), kept verbatim as
+baselines for the benchmarks.
+"""
+
+import os
+import sys
+import csv
+import glob
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import COLUMNS, NUMERIC_COLS, BOOLISH_COLS
+
+def _coerce_numeric(col, v):
+    if v is None:
+        return 0
+    s = str(v).strip().strip('\r')
+    if s == '' or s.lower() in ('nan','none','null'):
+        return 0
+    try:
+        if col in {'master_rank','presets_passed','volume','vol_eff','avg_vol','avg_vol_10d','avg_vol_3m','bid_size','ask_size','after_hours_vol'}:
+            return int(float(s))
+        return round(float(s), 6)
+    except (ValueError, TypeError):
+        return 0
+
+def _coerce_boolish(v):
+    if v is None:
+        return False
+    return str(v).strip().lower() in ('true','1','yes','y','t')
+
+def legacy_parse(path):
+    content = None
+    for enc in ('utf-8-sig','utf-8','cp1252','latin-1'):
+        try:
+            with open(path, 'r', encoding=enc, errors='replace') as f:
+                content = f.read()
+            break
+        except Exception:
+            continue
+    if content.startswith('\ufeff'):
+        content = content[1:]
+    reader = csv.DictReader(content.splitlines())
+    if reader.fieldnames:
+        reader.fieldnames = [str(f).strip().strip('\r').strip('\ufeff') for f in reader.fieldnames]
+    rows = []
+    for raw in reader:
+        row = []
+        for col in COLUMNS:
+            v = raw.get(col, '')
+            if col in NUMERIC_COLS:
+                v = _coerce_numeric(col, v)
+            elif col in BOOLISH_COLS:
+                v = _coerce_boolish(v)
+            else:
+                v = '' if v is None else str(v).strip().strip('\r')
+            row.append(v)
+        rows.append(row)
+    return rows
+
+def legacy_find_latest_csv(folder):
+    files = glob.glob(os.path.join(folder, "*.csv"))
+    return max(files, key=os.path.getmtime) if files else None
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the MAXXSCAN endpoints. For each synthetic screener size
+(default 1k..100k rows) it measures:
+
+  * load_csv_data() parse throughput (cold snapshot, best of --repeat);
+  * /api/data body size and time per format and encoding, cold (first
+    request encodes the body) and warm (pre-encoded body served);
+  * /api/status latency p50/p99 and throughput under concurrent clients,
+    through Flask's test client or, with --server, a local threaded server.
+
+Results are a flat {metric: {value, unit, better}} map written as JSON, so two
+runs can be compared; --compare exits non-zero when a metric regressed by more
+than --threshold.
+
+    python bench/run.py --out bench-results.json
+    python bench/run.py --sizes 1000,10000 --clients 1,16 --server --out new.json
+    python bench/run.py --compare bench-results.json new.json --threshold 0.15
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import app
+from synth import write_screener_csv
+
+ENCODINGS = ('identity', 'gzip', 'br')
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def _use_csv(path):
+    # point the app at one file and drop any cached snapshot so the next load parses
+    app.CSV_PATH, app.CSV_FOLDER = path, None
+    app._SNAPSHOT = app._new_snapshot(None, None)
+    app._RECENT.clear()
+
+def _metric(results, name, value, unit, better):
+    results[name] = {"value": round(value, 4), "unit": unit, "better": better}
+
+def bench_parse(results, rows, path, repeat):
+    best = None
+    for _ in range(repeat):
+        _use_csv(path)
+        t0 = time.perf_counter()
+        data = app.load_csv_data()
+        dt = time.perf_counter() - t0
+        if data["error"] is not None or data["total"] != rows:
+            sys.exit(f"parse failed for {path}: {data['error']}")
+        best = dt if best is None else min(best, dt)
+    _metric(results, f"parse.{rows}.seconds", best, "s", "lower")
+    _metric(results, f"parse.{rows}.rows_per_sec", rows / best, "rows/s", "higher")
+
+def bench_data(results, rows, path, repeat):
+    client = app.app.test_client()
+    for fmt in app._DATA_FORMATS:
+        for enc in ENCODINGS:
+            if enc == 'br' and app.brotli is None:
+                continue
+            headers = {'Accept-Encoding': enc}
+            _use_csv(path)
+            app.load_csv_data()
+            t0 = time.perf_counter()
+            resp = client.get(f'/api/data?format={fmt}', headers=headers)
+            cold = time.perf_counter() - t0
+            if resp.status_code != 200 or resp.headers.get('Content-Encoding', 'identity') != enc:
+                sys.exit(f"/api/data?format={fmt} ({enc}) returned {resp.status_code}")
+            warm = []
+            for _ in range(max(repeat, 5)):
+                t0 = time.perf_counter()
+                client.get(f'/api/data?format={fmt}', headers=headers).get_data()
+                warm.append(time.perf_counter() - t0)
+            name = f"data.{rows}.{fmt}.{enc}"
+            _metric(results, name + ".bytes", len(resp.get_data()), "B", "lower")
+            _metric(results, name + ".cold_ms", cold * 1000, "ms", "lower")
+            _metric(results, name + ".warm_ms", _pct(warm, 50) * 1000, "ms", "lower")
+
+class _Server:
+    """werkzeug's threaded dev server on a free port, in a daemon thread."""
+
+    def __init__(self):
+        from werkzeug.serving import make_server, WSGIRequestHandler
+
+        class Quiet(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.httpd = make_server('127.0.0.1', 0, app.app, threaded=True, request_handler=Quiet)
+        self.port = self.httpd.server_port
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def get(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        try:
+            conn.request('GET', '/api/status')
+            resp = conn.getresponse()
+            resp.read()
+            return resp.status
+        finally:
+            conn.close()
+
+    def close(self):
+        self.httpd.shutdown()
+
+def bench_status(results, rows, path, clients_list, requests, server):
+    _use_csv(path)
+    app.load_csv_data()
+    for clients in clients_list:
+        lat, errors, lock = [], [0], threading.Lock()
+        per_client = max(1, requests // clients)
+
+        def worker():
+            get = server.get if server else (lambda c=app.app.test_client(): c.get('/api/status').status_code)
+            mine, bad = [], 0
+            for _ in range(per_client):
+                t0 = time.perf_counter()
+                try:
+                    ok = get() == 200
+                except (OSError, http.client.HTTPException):
+                    ok = False
+                mine.append(time.perf_counter() - t0)
+                bad += not ok
+            with lock:
+                lat.extend(mine)
+                errors[0] += bad
+
+        threads = [threading.Thread(target=worker) for _ in range(clients)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - t0
+        name = f"status.{rows}.c{clients}"
+        _metric(results, name + ".p50_ms", _pct(lat, 50) * 1000, "ms", "lower")
+        _metric(results, name + ".p99_ms", _pct(lat, 99) * 1000, "ms", "lower")
+        _metric(results, name + ".req_per_sec", len(lat) / wall, "req/s", "higher")
+        _metric(results, name + ".errors", errors[0], "count", "lower")
+
+def _git_rev():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(BENCH_DIR),
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run(args):
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    clients = [int(c) for c in args.clients.split(',') if c]
+    results = {}
+    server = _Server() if args.server else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for rows in sizes:
+                path = write_screener_csv(os.path.join(tmp, f'screener_{rows}.csv'), rows, seed=args.seed)
+                bench_parse(results, rows, path, args.repeat)
+                bench_data(results, rows, path, args.repeat)
+                bench_status(results, rows, path, clients, args.requests, server)
+                p = results[f"parse.{rows}.rows_per_sec"]["value"]
+                d = results[f"data.{rows}.json.gzip.bytes"]["value"]
+                s = results[f"status.{rows}.c{clients[-1]}.p99_ms"]["value"]
+                print(f"  {rows:>7} rows  parse {p:>10,.0f} rows/s  json.gz {d / 1024:>9,.1f} KB  "
+                      f"status p99 @{clients[-1]} {s:.2f} ms")
+    finally:
+        if server:
+            server.close()
+    return {
+        "meta": {"time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "git": _git_rev(),
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "host": socket.gethostname(), "engine": app.INGEST_ENGINE, "sizes": sizes, "clients": clients,
+                 "repeat": args.repeat, "requests": args.requests, "server": bool(args.server)},
+        "metrics": results,
+    }
+
+def compare(base_path, new_path, threshold):
+    with open(base_path, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+    for k in ('engine', 'server', 'python', 'host', 'repeat', 'requests'):
+        if base["meta"].get(k) != new["meta"].get(k):
+            print(f"  warning: runs differ in {k}: {base['meta'].get(k)} vs {new['meta'].get(k)}")
+    base, new = base["metrics"], new["metrics"]
+    regressions = 0
+    print(f"  {'metric':<42} {'base':>12} {'new':>12} {'change':>8}")
+    for name in sorted(set(base) & set(new)):
+        old, cur, better = base[name]["value"], new[name]["value"], new[name]["better"]
+        if old == 0:
+            change = 0.0 if cur == 0 else float('inf')
+        else:
+            change = (cur - old) / abs(old)
+        worse = change > threshold if better == "lower" else change < -threshold
+        regressions += worse
+        print(f"  {name:<42} {old:>12.4g} {cur:>12.4g} {change * 100:>+7.1f}%{'  REGRESSION' if worse else ''}")
+    for name in sorted(set(base) ^ set(new)):
+        print(f"  {name:<42} only in {'base' if name in base else 'new'}")
+    print(f"  {regressions} regression(s) over {threshold * 100:.0f}%")
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description='MAXXSCAN endpoint benchmark suite')
+    parser.add_argument('--sizes', type=str, default='1000,10000,50000,100000')
+    parser.add_argument('--clients', type=str, default='1,8,32')
+    parser.add_argument('--requests', type=int, default=400, help='/api/status requests per concurrency level')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--server', action='store_true', default=False, help='hit a local threaded server instead of the test client')
+    parser.add_argument('--out', type=str, default=None)
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), default=None)
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative change that counts as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(args.compare[0], args.compare[1], args.threshold))
+    report = run(args)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"  wrote {args.out}")
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic screener CSVs shaped like screener_master.csv, for the bench scripts.
+"""
+
+import os
+import sys
+import csv
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import COLUMNS, NUMERIC_COLS, INT_COLS, BOOLISH_COLS
+
+EXCHANGES = ['NASDAQ', 'NYSE', 'AMEX', 'OTC']
+SECTORS = {
+    'Technology': ['Software', 'Semiconductors', 'IT Services', 'Hardware'],
+    'Healthcare': ['Biotechnology', 'Medical Devices', 'Pharmaceuticals'],
+    'Financial Services': ['Banks', 'Capital Markets', 'Insurance'],
+    'Energy': ['Oil & Gas E&P', 'Uranium', 'Solar'],
+    'Consumer Cyclical': ['Retail', 'Auto Parts', 'Restaurants'],
+    'Industrials': ['Aerospace & Defense', 'Trucking', 'Machinery'],
+}
+SESSIONS = ['PRE-MKT', 'OPEN', 'AFTER-HRS', 'CLOSED']
+PRESETS = ['FR', 'VS', 'GAP', 'HOD', 'SW', 'BW', 'VR']
+ARCHETYPES = ['EXPLOSIVE', 'MOMENTUM', 'ACCUMULATION', 'BREAKOUT', 'VOLATILE', '']
+CONFIDENCE = ['HIGH', 'MEDIUM', 'LOW', '']
+LINKS = {
+    'lnk_Yahoo': 'https://finance.yahoo.com/quote/{s}',
+    'lnk_StockTwits': 'https://stocktwits.com/symbol/{s}',
+    'lnk_Finviz': 'https://finviz.com/quote.ashx?t={s}',
+    'lnk_Webull': 'https://www.webull.com/quote/{x}-{s}',
+    'lnk_SEC_8K': 'https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&company={s}&type=8-K&dateb=&owner=include&count=10',
+    'lnk_Google_News': 'https://news.google.com/search?q={s}%20stock',
+    'lnk_Google_Finance': 'https://www.google.com/finance/quote/{s}:{x}',
+}
+
+def _symbols(rng, n):
+    seen = set()
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    while len(seen) < n:
+        s = ''.join(rng.choice(letters) for _ in range(rng.choice((1, 2, 3, 3, 4, 4, 4, 5))))
+        if s in seen:
+            s += '.' + str(len(seen))
+        seen.add(s)
+        yield s
+
+def _number(rng, col):
+    if col in INT_COLS:
+        if col in ('master_rank', 'presets_passed'):
+            return rng.randint(0, 7)
+        return int(rng.lognormvariate(12, 2))
+    if col.endswith('_pct') or col in ('chg_eff', 'hod_distance', 'pch_ratio'):
+        return round(rng.gauss(4, 12), rng.choice((2, 4, 6)))
+    if col.endswith('score') or col == 'ml_feature_coverage':
+        return round(rng.uniform(0, 100), 2)
+    if col in ('mkt_cap', 'shares_outstanding', 'total_shares'):
+        return round(rng.lognormvariate(19, 2), 0)
+    return round(rng.lognormvariate(2, 1.2), rng.choice((2, 2, 4)))
+
+def screener_rows(n, seed=7, blank_rate=0.04, nan_rate=0.02):
+    rng = random.Random(seed)
+    for rank, sym in enumerate(_symbols(rng, n), 1):
+        ex = rng.choice(EXCHANGES)
+        sector = rng.choice(list(SECTORS))
+        presets = rng.sample(PRESETS, rng.randint(0, 4))
+        row = {}
+        for col in COLUMNS:
+            if col in NUMERIC_COLS:
+                r = rng.random()
+                row[col] = '' if r < blank_rate else 'nan' if r < blank_rate + nan_rate else _number(rng, col)
+            elif col in BOOLISH_COLS:
+                row[col] = rng.choice(('True', 'False', 'False', 'False', ''))
+            elif col.startswith('lnk_'):
+                row[col] = LINKS[col].format(s=sym, x=ex)
+            else:
+                row[col] = ''
+        row.update({
+            'master_rank': rank, 'symbol': sym, 'name': f'{sym} Holdings Inc.', 'exchange': ex,
+            'sector': sector, 'industry': rng.choice(SECTORS[sector]), 'session': rng.choice(SESSIONS),
+            'presets_passed': len(presets), 'presets_list': '|'.join(presets),
+            'best_preset': presets[0] if presets else '', 'ml_archetype': rng.choice(ARCHETYPES),
+            'ml_confidence': rng.choice(CONFIDENCE),
+            'earnings_date': rng.choice(('', '', '', '2026-11-0%d' % rng.randint(1, 9))),
+            'dividend_date': '',
+        })
+        yield [row[c] for c in COLUMNS]
+
+def write_screener_csv(path, rows, seed=7, bom=False, crlf=False):
+    with open(path, 'w', newline='', encoding='utf-8-sig' if bom else 'utf-8') as f:
+        w = csv.writer(f, lineterminator='\r\n' if crlf else '\n')
+        w.writerow(COLUMNS)
+        w.writerows(screener_rows(rows, seed))
+    return path
+
+def write_screener_csv_mb(path, mb, seed=7):
+    target = int(mb * 1024 * 1024)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(COLUMNS)
+        for row in screener_rows(10 ** 7, seed):
+            w.writerow(row)
+            if f.tell() >= target:
+                break
+    return path
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic screener CSV')
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--mb', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--bom', action='store_true', default=False)
+    args = parser.parse_args()
+    if args.mb:
+        write_screener_csv_mb(args.path, args.mb, args.seed)
+    else:
+        write_screener_csv(args.path, args.rows, args.seed, bom=args.bom)
+    print(f"{args.path}: {round(os.path.getsize(args.path)/1024/1024, 2)} MB")
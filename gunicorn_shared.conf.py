@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+gunicorn settings for MAXXSCAN with one shared snapshot for all workers:
+
+    gunicorn -c gunicorn_shared.conf.py app:app
+
+The master parses each new CSV once and publishes it under MAXXSCAN_SHARED_DIR;
+workers map it read-only and follow the generation counter. Without
+MAXXSCAN_SHARED_DIR the directory is derived from the CSV source and the bind
+address, so two instances on one host never share loader.lock or `current`.
+This file is deliberately not named gunicorn.conf.py, which gunicorn would
+load for any run from this directory.
+"""
+
+import os
+import hashlib
+import tempfile
+
+bind = os.environ.get('MAXXSCAN_BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('MAXXSCAN_WORKERS', '4'))
+worker_class = 'gthread'
+threads = int(os.environ.get('MAXXSCAN_THREADS', '8'))
+
+_source = os.environ.get('MAXXSCAN_FOLDER') or os.environ.get('MAXXSCAN_CSV') or os.getcwd()
+_instance = hashlib.sha1(repr((os.path.abspath(_source), bind)).encode('utf-8')).hexdigest()[:12]
+os.environ.setdefault('MAXXSCAN_SHARED_DIR', os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+                                                          f'maxxscan-{_instance}'))
+os.environ.setdefault('MAXXSCAN_SHARED_PUBLISHER', 'master')
+
+def when_ready(server):
+    # imported here so the module (and its published snapshot) is inherited by every worker
+    import app
+    app.start_shared_loader()
+    server.log.info("MAXXSCAN shared snapshot: %s", app.shared_status())
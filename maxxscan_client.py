@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Small client for the MAXXSCAN /api/data feed, for bots that poll the screener:
+
+    from maxxscan_client import Feed, rows
+    feed = Feed('http://127.0.0.1:5000', fmt='msgpack')
+    while True:
+        snap = feed.poll()          # None while the snapshot is unchanged
+        if snap is not None:
+            for row in rows(snap):
+                ...
+        time.sleep(5)
+
+fmt is 'msgpack' (needs msgpack), 'arrow' (needs pyarrow) or 'json'. Every
+poll sends the last ETag, so an unchanged snapshot costs a 304 and no decode.
+json/msgpack polls return the payload dict ("columns", "col_index", "rows",
+"snapshot_id", ...). arrow polls return the same metadata plus "table", a
+pyarrow.Table typed int64/float64/bool/string. rows(snap) gives plain lists
+for any format, with projected link columns expanded.
+
+    python maxxscan_client.py --url http://127.0.0.1:5000 --format arrow
+"""
+
+import sys
+import json
+import time
+import gzip
+import argparse
+import urllib.error
+import urllib.request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ACCEPT = {
+    'json': 'application/json',
+    'msgpack': 'application/x-msgpack',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+def _decompress(body, encoding):
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'br':
+        return brotli.decompress(body)
+    return body
+
+def decode(body, fmt):
+    if fmt == 'msgpack':
+        return msgpack.unpackb(body, use_list=True)
+    if fmt == 'arrow':
+        table = pa.ipc.open_stream(body).read_all()
+        snap = json.loads(table.schema.metadata[b'maxxscan'])
+        snap["columns"] = table.column_names
+        snap["col_index"] = {c: i for i, c in enumerate(table.column_names)}
+        snap["table"] = table
+        return snap
+    return json.loads(body)
+
+def rows(snap):
+    # plain row lists laid out as snap["columns"] + snap.get("link_columns", []);
+    # projected feeds (cols=) send links as templates, expanded here
+    if "rows" in snap:
+        out = snap["rows"]
+    else:
+        out = list(zip(*(c.to_pylist() for c in snap["table"].columns)))
+    links = snap.get("link_columns") or []
+    if not links:
+        return [list(r) for r in out]
+    si, ei = snap["col_index"]["symbol"], snap["col_index"]["exchange"]
+    expanded = []
+    for r in out:
+        sym, ex = str(r[si]), str(r[ei])
+        extra = []
+        for c in links:
+            t, x = snap["links"][c]["t"], snap["links"][c]["x"]
+            extra.append(x[sym] if sym in x else t.replace('{symbol}', sym).replace('{exchange}', ex))
+        expanded.append(list(r) + extra)
+    return expanded
+
+class Feed:
+    def __init__(self, base_url, fmt='msgpack', cols=None, timeout=30.0):
+        if fmt not in ACCEPT:
+            raise ValueError(f"Unknown format: {fmt}")
+        if fmt == 'msgpack' and msgpack is None:
+            raise RuntimeError("format='msgpack' needs the msgpack package")
+        if fmt == 'arrow' and pa is None:
+            raise RuntimeError("format='arrow' needs the pyarrow package")
+        self.url = base_url.rstrip('/') + '/api/data?format=' + fmt + ('&cols=' + ','.join(cols) if cols else '')
+        self.fmt, self.timeout = fmt, timeout
+        self.etag = None
+        self.last = {"bytes": 0, "fetch_ms": 0.0, "decode_ms": 0.0}
+
+    def poll(self):
+        headers = {'Accept': ACCEPT[self.fmt], 'Accept-Encoding': 'br, gzip' if brotli is not None else 'gzip'}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url, headers=headers), timeout=self.timeout) as resp:
+                body = resp.read()
+                encoding = resp.headers.get('Content-Encoding', 'identity')
+                etag = resp.headers.get('ETag')
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise RuntimeError(f"{self.url}: HTTP {e.code}: {e.read()[:200]!r}") from None
+        t1 = time.perf_counter()
+        snap = decode(_decompress(body, encoding), self.fmt)
+        if snap.get("error"):
+            raise RuntimeError(f"{self.url}: {snap['error']}")
+        self.etag = etag
+        self.last = {"bytes": len(body), "fetch_ms": (t1 - t0) * 1000, "decode_ms": (time.perf_counter() - t1) * 1000}
+        return snap
+
+def main():
+    parser = argparse.ArgumentParser(description='Poll the MAXXSCAN data feed')
+    parser.add_argument('--url', type=str, default='http://127.0.0.1:5000')
+    parser.add_argument('--format', type=str, default='msgpack', choices=sorted(ACCEPT))
+    parser.add_argument('--cols', type=str, default=None, help='comma-separated column projection')
+    parser.add_argument('--interval', type=float, default=0, help='keep polling every N seconds')
+    args = parser.parse_args()
+    try:
+        feed = Feed(args.url, args.format, args.cols.split(',') if args.cols else None)
+    except (ValueError, RuntimeError) as e:
+        sys.exit(str(e))
+    while True:
+        snap = feed.poll()
+        if snap is None:
+            print("  unchanged (304)")
+        else:
+            print(f"  {snap['snapshot_id']}  {snap['total']} rows x {len(snap['columns'])} cols  "
+                  f"{feed.last['bytes'] / 1024:.1f} KB  fetch {feed.last['fetch_ms']:.1f} ms  "
+                  f"decode {feed.last['decode_ms']:.1f} ms")
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+if __name__ == '__main__':
+    main()